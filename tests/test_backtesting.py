@@ -0,0 +1,101 @@
+from datetime import date, datetime
+
+import pytest
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.optimize import OptimizationSetting
+
+import vnpy_ctastrategy.backtesting as backtesting
+from vnpy_ctastrategy.backtesting import BacktestingEngine
+from vnpy_ctastrategy.benchmark import generate_bar_data
+from vnpy_ctastrategy.strategies.double_ma_strategy import DoubleMaStrategy
+
+
+class FakeDatabase:
+    """
+    Database of synthetic bars, only available in the test process.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.bars: list = generate_bar_data(date(2023, 1, 2), 20000, seed=1).to_list()
+
+    def load_bar_data(
+        self, symbol: str, exchange: Exchange, interval: Interval, start: datetime, end: datetime
+    ) -> list:
+        """"""
+        if not start.tzinfo:
+            start = start.replace(tzinfo=DB_TZ)
+        if not end.tzinfo:
+            end = end.replace(tzinfo=DB_TZ)
+
+        return [bar for bar in self.bars if start <= bar.datetime <= end]
+
+
+@pytest.fixture
+def database(monkeypatch: pytest.MonkeyPatch) -> FakeDatabase:
+    """
+    Patch database in this process, while worker processes have none.
+    """
+    database: FakeDatabase = FakeDatabase()
+    monkeypatch.setattr(backtesting, "get_database", lambda: database)
+    backtesting.load_bar_data.cache_clear()
+    return database
+
+
+def create_engine() -> BacktestingEngine:
+    """"""
+    engine: BacktestingEngine = BacktestingEngine()
+    engine.set_parameters(
+        vt_symbol="IF888.CFFEX",
+        interval=Interval.MINUTE,
+        start=datetime(2023, 2, 1),
+        end=datetime(2023, 4, 28),
+        rate=0.3 / 10000,
+        slippage=0.2,
+        size=300,
+        pricetick=0.2,
+        capital=1_000_000
+    )
+    engine.add_strategy(DoubleMaStrategy, {})
+    return engine
+
+
+def test_batch_optimization_with_shared_history_only(database: FakeDatabase) -> None:
+    """
+    Child engines of batch mode should load warm-up data from shared history.
+    """
+    optimization_setting: OptimizationSetting = OptimizationSetting()
+    optimization_setting.set_target("total_net_pnl")
+    optimization_setting.add_parameter("fast_window", 5, 10, 5)
+    optimization_setting.add_parameter("slow_window", 20, 30, 10)
+
+    batch_results: list = create_engine().run_bf_optimization(
+        optimization_setting,
+        output=False,
+        max_workers=2,
+        share_history=True,
+        batch_size=2
+    )
+    results: list = create_engine().run_bf_optimization(
+        optimization_setting,
+        output=False,
+        max_workers=2,
+        share_history=True
+    )
+
+    assert len(batch_results) == 4
+    assert sorted((str(r[0]), r[1]) for r in batch_results) == sorted((str(r[0]), r[1]) for r in results)
+
+    # Same as backtesting in this process with database
+    setting: dict = {"fast_window": 5, "slow_window": 20}
+
+    engine: BacktestingEngine = create_engine()
+    engine.add_strategy(DoubleMaStrategy, setting)
+    engine.load_data()
+    engine.run_backtesting()
+    engine.calculate_result()
+    statistics: dict = engine.calculate_statistics(output=False)
+
+    batch_values: dict = {str(r[0]): r[1] for r in batch_results}
+    assert batch_values[str(setting)] == pytest.approx(statistics["total_net_pnl"])
@@ -0,0 +1,70 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from vnpy.trader.database import DB_TZ
+
+import vnpy_ctastrategy.backtesting as backtesting
+from vnpy_ctastrategy.backtesting import BacktestingMode, BacktestingEngine
+from vnpy_ctastrategy.benchmark import create_engine, generate_bar_data, run_benchmark
+from vnpy_ctastrategy.history import ColumnarData, SharedHistory, attach_history
+from vnpy_ctastrategy.strategies.double_ma_strategy import DoubleMaStrategy
+
+
+@pytest.fixture
+def no_database(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Make any database query in this process fail.
+    """
+    def get_database() -> None:
+        """"""
+        raise AssertionError("database should not be queried")
+
+    monkeypatch.setattr(backtesting, "get_database", get_database)
+    backtesting.load_bar_data.cache_clear()
+
+
+def test_publish_history_with_warmup_given(no_database: None) -> None:
+    """
+    Warm-up data already in history data should be published once without database.
+    """
+    bar_data: ColumnarData = generate_bar_data(date(2020, 1, 1), 20000)
+    start: datetime = datetime(2020, 2, 10, tzinfo=DB_TZ)
+    end: datetime = datetime.fromtimestamp(bar_data.datetimes[-1] / 1_000_000, DB_TZ)
+
+    engine: BacktestingEngine = create_engine(BacktestingMode.BAR, start, end)
+    engine.add_strategy(DoubleMaStrategy, {})
+    engine.history_data = bar_data
+
+    history: SharedHistory = engine.publish_history()
+
+    try:
+        data: ColumnarData = attach_history(history)
+
+        assert history.length == len(bar_data)
+        assert (np.diff(data.datetimes) > 0).all()
+        assert history.start == int(bar_data.datetimes[0])
+    finally:
+        engine.release_history()
+
+
+def test_run_benchmark_with_optimization(no_database: None) -> None:
+    """
+    Benchmark should run optimization on synthetic data without database.
+    """
+    report: dict = run_benchmark(
+        bar_count=3000,
+        tick_count=3000,
+        strategies=[DoubleMaStrategy.__name__],
+        measure_memory=False,
+        optimization=True,
+        max_workers=2
+    )
+
+    names: list[str] = [c["name"] for c in report["cases"]]
+    assert names == ["bar_DoubleMaStrategy", "tick_DoubleMaStrategy", "optimization_DoubleMaStrategy"]
+
+    case: dict = report["cases"][-1]
+    assert case["evaluations"] == 16
+    assert case["events"] == 3000 * 16
+    assert report["summary"]["evaluations_per_second"] > 0
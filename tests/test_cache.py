@@ -0,0 +1,259 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Barrier, Thread
+
+import pytest
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import BarData
+
+import vnpy_ctastrategy.cache as cache_module
+from vnpy_ctastrategy.cache import HistoryCache, HistoryQueryCoalescer
+from vnpy_ctastrategy.history import ColumnarData
+
+
+BASE: datetime = datetime(2023, 1, 2, tzinfo=DB_TZ)
+
+
+class FakeFetcher:
+    """
+    Fetch function of 1 minute bars, recording ranges queried.
+    """
+
+    def __init__(self, symbol: str = "IF888", barrier: Barrier | None = None) -> None:
+        """"""
+        self.symbol: str = symbol
+        self.barrier: Barrier | None = barrier
+        self.ranges: list[tuple[datetime, datetime]] = []
+
+    def __call__(self, start: datetime, end: datetime) -> list[BarData]:
+        """"""
+        self.ranges.append((start, end))
+
+        # Wait for fetches of other symbols running at the same time
+        if self.barrier:
+            self.barrier.wait()
+
+        return generate_bars(self.symbol, start, end)
+
+
+def generate_bars(symbol: str, start: datetime, end: datetime) -> list[BarData]:
+    """
+    Generate bars of every minute since BASE within [start, end].
+    """
+    ix: int = max(0, -(-int((start - BASE).total_seconds()) // 60))
+    bars: list[BarData] = []
+
+    while True:
+        dt: datetime = BASE + timedelta(minutes=ix)
+        if dt > end:
+            break
+
+        bars.append(BarData(
+            symbol=symbol,
+            exchange=Exchange.CFFEX,
+            datetime=dt,
+            interval=Interval.MINUTE,
+            close_price=ix,
+            gateway_name="DB"
+        ))
+        ix += 1
+
+    return bars
+
+
+def load(cache: HistoryCache, fetcher: FakeFetcher, start_minute: int, end_minute: int) -> ColumnarData:
+    """"""
+    return cache.load_bar_data(
+        fetcher.symbol,
+        Exchange.CFFEX,
+        Interval.MINUTE,
+        BASE + timedelta(minutes=start_minute),
+        BASE + timedelta(minutes=end_minute),
+        fetcher
+    )
+
+
+def get_prices(data: ColumnarData) -> list[float]:
+    """"""
+    return [bar.close_price for bar in data]
+
+
+def test_fetch_only_gaps(tmp_path: Path) -> None:
+    """
+    Only ranges not covered by cache should be fetched, and data should be the same as fetched directly.
+    """
+    cache: HistoryCache = HistoryCache(tmp_path)
+    fetcher: FakeFetcher = FakeFetcher()
+
+    assert get_prices(load(cache, fetcher, 100, 200)) == list(range(100, 201))
+    assert len(fetcher.ranges) == 1
+
+    # Fully covered range is served from cache
+    assert get_prices(load(cache, fetcher, 120, 180)) == list(range(120, 181))
+    assert len(fetcher.ranges) == 1
+    assert cache.hit_count == 1
+
+    # Only gaps on both sides are fetched
+    assert get_prices(load(cache, fetcher, 50, 250)) == list(range(50, 251))
+    assert fetcher.ranges[1:] == [
+        (BASE + timedelta(minutes=50), BASE + timedelta(minutes=100) - timedelta(microseconds=1)),
+        (BASE + timedelta(minutes=200) + timedelta(microseconds=1), BASE + timedelta(minutes=250)),
+    ]
+
+    # Segments are merged into one, so a cache in another process hits it directly
+    other: HistoryCache = HistoryCache(tmp_path)
+    assert get_prices(load(other, fetcher, 60, 240)) == list(range(60, 241))
+    assert len(fetcher.ranges) == 3
+    assert other.hit_count == 1
+
+
+def test_empty_tail_not_covered(tmp_path: Path) -> None:
+    """
+    Period after the last data should be fetched again if cover_empty is False.
+    """
+    cache: HistoryCache = HistoryCache(tmp_path)
+    ranges: list[tuple[datetime, datetime]] = []
+    available: list[int] = [150]
+
+    def fetch(start: datetime, end: datetime) -> list[BarData]:
+        """"""
+        ranges.append((start, end))
+        return generate_bars("IF888", start, min(end, BASE + timedelta(minutes=available[0])))
+
+    def load_lagging() -> list[float]:
+        """"""
+        data: ColumnarData = cache.load_bar_data(
+            "IF888",
+            Exchange.CFFEX,
+            Interval.MINUTE,
+            BASE + timedelta(minutes=100),
+            BASE + timedelta(minutes=200),
+            fetch,
+            cover_empty=False
+        )
+        return get_prices(data)
+
+    assert load_lagging() == list(range(100, 151))
+
+    available[0] = 200
+    assert load_lagging() == list(range(100, 201))
+    assert ranges[1][0] == BASE + timedelta(minutes=150) + timedelta(microseconds=1)
+
+
+def test_evict_least_recently_used(tmp_path: Path) -> None:
+    """
+    Least recently used segments should be evicted when total size exceeds limit.
+    """
+    fetchers: dict[str, FakeFetcher] = {s: FakeFetcher(s) for s in ["A", "B", "C"]}
+
+    # Size of one segment of 1000 bars
+    cache: HistoryCache = HistoryCache(tmp_path)
+    load(cache, fetchers["A"], 0, 999)
+    segment_bytes: int = cache.get_statistics()["total_bytes"]
+    cache.clear()
+
+    cache = HistoryCache(tmp_path, max_bytes=segment_bytes * 2)
+    load(cache, fetchers["A"], 0, 999)
+    load(cache, fetchers["B"], 0, 999)
+
+    # Access A so that B becomes the least recently used
+    load(cache, fetchers["A"], 0, 999)
+    load(cache, fetchers["C"], 0, 999)
+
+    assert cache.evict_count == 1
+    assert cache.get_statistics()["total_bytes"] <= segment_bytes * 2
+
+    fetch_counts: dict[str, int] = {s: len(f.ranges) for s, f in fetchers.items()}
+
+    for symbol in ["A", "C"]:
+        assert get_prices(load(cache, fetchers[symbol], 0, 999)) == list(range(1000))
+    assert {s: len(f.ranges) for s, f in fetchers.items()} == fetch_counts
+
+    # Evicted data is fetched again
+    assert get_prices(load(cache, fetchers["B"], 0, 999)) == list(range(1000))
+    assert len(fetchers["B"].ranges) == fetch_counts["B"] + 1
+
+    # No files left other than those of segments in index
+    names: set[str] = set()
+    for folder in tmp_path.iterdir():
+        names.update(d["name"] for d in cache.read_index(folder))
+
+    files: set[str] = {p.name.split(".")[0] for p in tmp_path.rglob("*.npy")}
+    assert files == names
+
+
+def test_symbols_fetched_concurrently(tmp_path: Path) -> None:
+    """
+    Fetching one symbol should not block other symbols sharing the cache.
+    """
+    symbols: list[str] = ["A", "B", "C"]
+    barrier: Barrier = Barrier(len(symbols), timeout=10)
+
+    cache: HistoryCache = HistoryCache(tmp_path)
+    results: dict[str, list[float]] = {}
+
+    def run(symbol: str) -> None:
+        """"""
+        fetcher: FakeFetcher = FakeFetcher(symbol, barrier)
+        results[symbol] = get_prices(load(cache, fetcher, 0, 99))
+
+    threads: list[Thread] = [Thread(target=run, args=(s,)) for s in symbols]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Barrier is broken if fetches are serialized by lock
+    assert not barrier.broken
+    assert results == {s: list(range(100)) for s in symbols}
+
+
+def test_coalescer_expire_by_age(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Finished queries should be shared until max_age old, and failed queries never.
+    """
+    now: list[float] = [1000]
+    monkeypatch.setattr(cache_module, "time", lambda: now[0])
+
+    coalescer: HistoryQueryCoalescer = HistoryQueryCoalescer(10)
+    fetcher: FakeFetcher = FakeFetcher()
+
+    def query(start_minute: int, end_minute: int) -> list[float]:
+        """"""
+        data: list = coalescer.query(
+            "IF888",
+            BASE + timedelta(minutes=start_minute),
+            BASE + timedelta(minutes=end_minute),
+            fetcher
+        )
+        return [bar.close_price for bar in data]
+
+    assert query(0, 100) == list(range(101))
+    now[0] += 5
+    assert query(50, 100) == list(range(50, 101))
+    assert query(20, 80) == list(range(20, 81))
+    assert len(fetcher.ranges) == 1
+
+    # Range not covered is queried
+    assert query(0, 200) == list(range(201))
+    assert len(fetcher.ranges) == 2
+
+    now[0] += 6
+    assert query(50, 100) == list(range(50, 101))
+    assert len(fetcher.ranges) == 2
+
+    # First query is expired, and second one too after max_age
+    assert len(coalescer.queries["IF888"]) == 1
+    now[0] += 10
+    assert query(50, 100) == list(range(50, 101))
+    assert len(fetcher.ranges) == 3
+
+    def fail(start: datetime, end: datetime) -> list[BarData]:
+        """"""
+        raise ConnectionError()
+
+    with pytest.raises(ConnectionError):
+        coalescer.query("IC888", BASE, BASE + timedelta(minutes=100), fail)
+    assert "IC888" not in coalescer.queries
@@ -0,0 +1,85 @@
+from pathlib import Path
+from time import sleep
+from typing import Any
+
+from vnpy_ctastrategy.distributed import JobQueue, run_worker
+
+
+def collect_results(queue: JobQueue, task_id: int, total: int) -> dict[int, tuple[bool, Any]]:
+    """"""
+    return {ix: (success, value) for ix, success, value in queue.iter_results(task_id, total, 0.01)}
+
+
+def test_reclaim_stale_job(tmp_path: Path) -> None:
+    """
+    Job without heartbeat for longer than timeout should be handed out to another worker.
+    """
+    path: Path = tmp_path.joinpath("queue.db")
+    queue: JobQueue = JobQueue(path, timeout=0.1)
+    task_id: int = queue.create_task(abs, [-1])
+
+    crashed: JobQueue = JobQueue(path, timeout=0.1)
+    job: tuple[int, int, bytes] | None = crashed.fetch_job("crashed")
+    assert job
+
+    # Job is not handed out again before timeout
+    other: JobQueue = JobQueue(path, timeout=0.1)
+    assert other.fetch_job("other") is None
+
+    sleep(0.2)
+    reclaimed: tuple[int, int, bytes] | None = other.fetch_job("other")
+    assert reclaimed == job
+
+    job_id: int = reclaimed[0]
+    other.finish_job(job_id, 1)
+
+    # Late result of crashed worker is ignored
+    crashed.finish_job(job_id, 2)
+
+    assert collect_results(queue, task_id, 1) == {0: (True, 1)}
+    assert queue.count_jobs() == {"done": 1}
+
+    for q in [queue, crashed, other]:
+        q.close()
+
+
+def test_fail_after_max_attempts(tmp_path: Path) -> None:
+    """
+    Job reclaimed max_attempts times should be marked failed instead of pending.
+    """
+    queue: JobQueue = JobQueue(tmp_path.joinpath("queue.db"), timeout=0.05, max_attempts=2)
+    task_id: int = queue.create_task(abs, [-1])
+
+    for __ in range(2):
+        assert queue.fetch_job("crashed")
+        sleep(0.1)
+
+    assert queue.fetch_job("crashed") is None
+    assert queue.count_jobs() == {"failed": 1}
+
+    results: dict[int, tuple[bool, Any]] = collect_results(queue, task_id, 1)
+    assert not results[0][0]
+
+    queue.close()
+
+
+def test_run_worker(tmp_path: Path) -> None:
+    """
+    Worker should run all jobs, and fail those with payload signed by another key.
+    """
+    path: Path = tmp_path.joinpath("queue.db")
+    queue: JobQueue = JobQueue(path, timeout=5, max_attempts=1, key="secret")
+    task_id: int = queue.create_task(abs, [-1, -2, 3])
+
+    run_worker(JobQueue(path, timeout=5, key="secret"), "worker", poll_interval=0.01, idle_timeout=0.05)
+    assert collect_results(queue, task_id, 3) == {0: (True, 1), 1: (True, 2), 2: (True, 3)}
+
+    task_id = queue.create_task(abs, [-1])
+
+    run_worker(JobQueue(path, timeout=5, key="other"), "worker", poll_interval=0.01, idle_timeout=0.05)
+    results: dict[int, tuple[bool, Any]] = collect_results(queue, task_id, 1)
+
+    assert not results[0][0]
+    assert "ValueError" in results[0][1]
+
+    queue.close()
@@ -0,0 +1,256 @@
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+from random import Random
+
+import pytest
+from vnpy.event import EventEngine
+from vnpy.trader.constant import Direction, Exchange, Interval, Offset, Product
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import BarData, ContractData, TickData
+
+import vnpy_ctastrategy.engine as engine_module
+from vnpy_ctastrategy.base import StopOrder, StopOrderStatus
+from vnpy_ctastrategy.engine import CtaEngine
+
+
+SYMBOLS: list[str] = ["IF888.CFFEX", "IC888.CFFEX"]
+
+
+class FakeMainEngine:
+    """
+    Main engine providing contracts only for symbols available.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.available: set[str] = set(SYMBOLS)
+
+    def get_contract(self, vt_symbol: str) -> ContractData | None:
+        """"""
+        if vt_symbol not in self.available:
+            return None
+
+        symbol, exchange = vt_symbol.split(".")
+        return ContractData(
+            symbol=symbol,
+            exchange=Exchange(exchange),
+            name=symbol,
+            product=Product.FUTURES,
+            size=300,
+            pricetick=0.2,
+            gateway_name="TEST"
+        )
+
+
+class FakeStrategy:
+    """
+    Strategy recording ids of stop orders triggered into a shared list.
+    """
+
+    def __init__(self, strategy_name: str, vt_symbol: str, triggered: list[str]) -> None:
+        """"""
+        self.strategy_name: str = strategy_name
+        self.vt_symbol: str = vt_symbol
+        self.triggered: list[str] = triggered
+
+    def on_stop_order(self, stop_order: StopOrder) -> None:
+        """"""
+        if stop_order.status == StopOrderStatus.TRIGGERED:
+            self.triggered.append(stop_order.stop_orderid)
+
+
+@pytest.fixture
+def cta_engine(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[CtaEngine]:
+    """
+    Live engine without database, datafeed and gateway.
+    """
+    monkeypatch.setattr(engine_module, "get_database", lambda: None)
+    monkeypatch.setattr(engine_module, "get_datafeed", lambda: None)
+    monkeypatch.setattr(CtaEngine, "setting_filename", str(tmp_path.joinpath("setting.json")))
+    monkeypatch.setattr(CtaEngine, "data_filename", str(tmp_path.joinpath("data.json")))
+
+    engine: CtaEngine = CtaEngine(FakeMainEngine(), EventEngine())     # type: ignore
+    engine.send_limit_order = lambda *args: ["TEST.1"]                  # type: ignore
+
+    yield engine
+
+    engine.store.close()
+    engine.init_executor.shutdown()
+
+
+def create_tick(vt_symbol: str, price: float) -> TickData:
+    """"""
+    symbol, exchange = vt_symbol.split(".")
+    return TickData(
+        symbol=symbol,
+        exchange=Exchange(exchange),
+        datetime=datetime.now(DB_TZ),
+        last_price=price,
+        limit_up=price * 1.1,
+        limit_down=price * 0.9,
+        gateway_name="TEST"
+    )
+
+
+def check_stop_order_linear(
+    stop_orders: dict[str, StopOrder],
+    tick: TickData,
+    available: set[str]
+) -> list[str]:
+    """
+    Original linear scan over all stop orders, return ids triggered in order.
+    """
+    triggered: list[str] = []
+
+    for stop_order in list(stop_orders.values()):
+        if stop_order.vt_symbol != tick.vt_symbol:
+            continue
+
+        long_triggered: bool = (
+            stop_order.direction == Direction.LONG and tick.last_price >= stop_order.price
+        )
+        short_triggered: bool = (
+            stop_order.direction == Direction.SHORT and tick.last_price <= stop_order.price
+        )
+
+        # Stop order is kept if contract not found
+        if (long_triggered or short_triggered) and stop_order.vt_symbol in available:
+            stop_orders.pop(stop_order.stop_orderid)
+            triggered.append(stop_order.stop_orderid)
+
+    return triggered
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stop_heaps_same_as_linear_scan(cta_engine: CtaEngine, seed: int) -> None:
+    """
+    Stop orders triggered from heaps should be the same as linear scan, in the same order.
+    """
+    rng: Random = Random(seed)
+    main_engine: FakeMainEngine = cta_engine.main_engine                # type: ignore
+
+    triggered: list[str] = []
+    strategies: list[FakeStrategy] = []
+
+    for i, vt_symbol in enumerate(SYMBOLS * 2):
+        strategy: FakeStrategy = FakeStrategy(f"s{i}", vt_symbol, triggered)
+        cta_engine.strategies[strategy.strategy_name] = strategy
+        strategies.append(strategy)
+
+    expected_orders: dict[str, StopOrder] = {}
+
+    for __ in range(3000):
+        n: float = rng.random()
+
+        if n < 0.5:
+            strategy = rng.choice(strategies)
+            direction: Direction = rng.choice([Direction.LONG, Direction.SHORT])
+            price: float = round(rng.uniform(90, 110), 1)
+
+            stop_orderid: str = cta_engine.send_local_stop_order(
+                strategy, direction, Offset.OPEN, price, 1, False, False    # type: ignore
+            )[0]
+            expected_orders[stop_orderid] = cta_engine.stop_orders[stop_orderid]
+        elif n < 0.8:
+            if expected_orders:
+                stop_orderid = rng.choice(list(expected_orders))
+                expected_orders.pop(stop_orderid)
+
+                strategy = cta_engine.strategies[cta_engine.stop_orders[stop_orderid].strategy_name]
+                cta_engine.cancel_local_stop_order(strategy, stop_orderid)  # type: ignore
+        else:
+            main_engine.available = {s for s in SYMBOLS if rng.random() < 0.9}
+
+            tick: TickData = create_tick(rng.choice(SYMBOLS), round(rng.uniform(90, 110), 1))
+            expected: list[str] = check_stop_order_linear(expected_orders, tick, main_engine.available)
+
+            triggered.clear()
+            cta_engine.check_stop_order(tick)
+            assert triggered == expected
+
+        assert set(cta_engine.stop_orders) == set(expected_orders)
+
+        # Heaps are kept within size limit by compaction
+        for vt_symbol in SYMBOLS:
+            size: int = len(cta_engine.long_stop_heaps[vt_symbol]) + len(cta_engine.short_stop_heaps[vt_symbol])
+            assert size <= len(cta_engine.stop_orders) * 2 + 65
+
+
+def test_stop_heaps_compacted_after_cancel(cta_engine: CtaEngine) -> None:
+    """
+    Entries of cancelled stop orders should be dropped when heaps are compacted.
+    """
+    triggered: list[str] = []
+    strategy: FakeStrategy = FakeStrategy("s", SYMBOLS[0], triggered)
+    cta_engine.strategies[strategy.strategy_name] = strategy
+
+    stop_orderids: list[str] = []
+    for i in range(500):
+        stop_orderids.extend(cta_engine.send_local_stop_order(
+            strategy, Direction.LONG, Offset.OPEN, 100 + i, 1, False, False     # type: ignore
+        ))
+
+    for stop_orderid in stop_orderids:
+        cta_engine.cancel_local_stop_order(strategy, stop_orderid)              # type: ignore
+
+    assert len(cta_engine.long_stop_heaps[SYMBOLS[0]]) == 500
+
+    stop_orderids = cta_engine.send_local_stop_order(
+        strategy, Direction.LONG, Offset.OPEN, 99, 1, False, False              # type: ignore
+    )
+    assert len(cta_engine.long_stop_heaps[SYMBOLS[0]]) == 1
+
+    # Cancelled stop orders are never triggered
+    cta_engine.check_stop_order(create_tick(SYMBOLS[0], 1000))
+    assert triggered == stop_orderids
+    assert not cta_engine.stop_orders
+
+
+def test_load_bar_nested_ranges_share_query(cta_engine: CtaEngine) -> None:
+    """
+    Sequential load_bar calls of nested ranges should be served by one query.
+    """
+    ranges: list[tuple[datetime, datetime]] = []
+
+    def query_bar(
+        vt_symbol: str,
+        interval: Interval,
+        use_database: bool,
+        start: datetime,
+        end: datetime
+    ) -> list[BarData]:
+        """"""
+        ranges.append((start, end))
+
+        bars: list[BarData] = []
+        dt: datetime = start
+        while dt <= end:
+            bars.append(BarData(
+                symbol="IF888",
+                exchange=Exchange.CFFEX,
+                datetime=dt,
+                interval=interval,
+                gateway_name="TEST"
+            ))
+            dt += timedelta(hours=1)
+        return bars
+
+    cta_engine.query_bar = query_bar                                    # type: ignore
+
+    bars_10: list[BarData] = cta_engine.load_bar(SYMBOLS[0], 10, Interval.HOUR, print, False)
+    bars_5: list[BarData] = cta_engine.load_bar(SYMBOLS[0], 5, Interval.HOUR, print, False)
+    bars_3: list[BarData] = cta_engine.load_bar(SYMBOLS[0], 3, Interval.HOUR, print, False)
+
+    assert len(ranges) == 1
+    assert len(bars_10) == 10 * 24 + 1
+    assert [bar.datetime for bar in bars_5] == [bar.datetime for bar in bars_10[-len(bars_5):]]
+    assert len(bars_5) in (5 * 24, 5 * 24 + 1)
+    assert len(bars_3) in (3 * 24, 3 * 24 + 1)
+
+    # Each strategy gets its own bar objects
+    assert bars_5[0] is not bars_10[-len(bars_5)]
+
+    # Other interval is queried separately
+    cta_engine.load_bar(SYMBOLS[0], 5, Interval.MINUTE, print, False)
+    assert len(ranges) == 2
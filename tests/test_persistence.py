@@ -0,0 +1,115 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from time import perf_counter, sleep
+
+import pytest
+from vnpy.event import EventEngine
+
+import vnpy_ctastrategy.engine as engine_module
+from vnpy_ctastrategy.engine import CtaEngine
+from vnpy_ctastrategy.persistence import JsonFileWriter
+from vnpy_ctastrategy.template import CtaTemplate
+
+
+class DummyStrategy(CtaTemplate):
+    """"""
+
+    def on_init(self) -> None:
+        """"""
+        pass
+
+
+def read_file(filepath: Path) -> dict:
+    """"""
+    with open(filepath, encoding="UTF-8") as f:
+        data: dict = json.load(f)
+    return data
+
+
+@pytest.fixture
+def writer(tmp_path: Path) -> Iterator[JsonFileWriter]:
+    """
+    Writer with interval long enough that background thread never writes in test.
+    """
+    writer: JsonFileWriter = JsonFileWriter(str(tmp_path.joinpath("data.json")), interval=60)
+    yield writer
+    writer.close()
+
+
+def test_write_in_background(tmp_path: Path) -> None:
+    """
+    Updates within interval should be written together in background.
+    """
+    writer: JsonFileWriter = JsonFileWriter(str(tmp_path.joinpath("data.json")), interval=0.1)
+
+    try:
+        writer.update("a", {"pos": 1})
+        writer.update("a", {"pos": 2})
+        writer.update("b", {"pos": 3})
+
+        for __ in range(50):
+            if writer.filepath.exists() and not writer.dirty:
+                break
+            sleep(0.1)
+
+        assert read_file(writer.filepath) == {"a": {"pos": 2}, "b": {"pos": 3}}
+    finally:
+        writer.close()
+
+
+def test_flush_writes_immediately(writer: JsonFileWriter) -> None:
+    """
+    Flush should write pending updates without waiting for interval.
+    """
+    writer.set_data({"old": {"pos": 1}, "removed": {"pos": 2}})
+    writer.update("new", {"pos": 3})
+    writer.remove("removed")
+
+    writer.flush()
+
+    # Data loaded but not updated is kept in file
+    assert read_file(writer.filepath) == {"old": {"pos": 1}, "new": {"pos": 3}}
+
+
+def test_close_writes_pending(writer: JsonFileWriter) -> None:
+    """
+    Close should stop background thread and write pending updates at once.
+    """
+    writer.update("a", {"pos": 1})
+
+    start: float = perf_counter()
+    writer.close()
+
+    assert perf_counter() - start < 10
+    assert not writer.thread.is_alive()
+    assert read_file(writer.filepath) == {"a": {"pos": 1}}
+
+    # Close again does nothing
+    writer.close()
+
+
+def test_stop_strategy_flushes_data(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """
+    Data of strategy stopped should be in file without waiting for background write.
+    """
+    monkeypatch.setattr(engine_module, "get_database", lambda: None)
+    monkeypatch.setattr(engine_module, "get_datafeed", lambda: None)
+    monkeypatch.setattr(CtaEngine, "setting_filename", str(tmp_path.joinpath("setting.json")))
+    monkeypatch.setattr(CtaEngine, "data_filename", str(tmp_path.joinpath("data.json")))
+    monkeypatch.setattr(CtaEngine, "data_write_interval", 60)
+
+    engine: CtaEngine = CtaEngine(None, EventEngine())     # type: ignore
+
+    try:
+        strategy: CtaTemplate = DummyStrategy(engine, "test", "IF888.CFFEX", {})
+        engine.strategies[strategy.strategy_name] = strategy
+
+        strategy.trading = True
+        strategy.pos = 5
+        engine.stop_strategy(strategy.strategy_name)
+
+        assert read_file(tmp_path.joinpath("data.json")) == {"test": {"pos": 5}}
+    finally:
+        engine.store.close()
+        engine.init_executor.shutdown()
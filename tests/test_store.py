@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+from vnpy_ctastrategy.store import JsonStrategyStore, SqliteStrategyStore
+
+
+def create_setting(vt_symbol: str, fast_window: int) -> dict:
+    """"""
+    return {
+        "class_name": "DoubleMaStrategy",
+        "vt_symbol": vt_symbol,
+        "setting": {"fast_window": fast_window, "name": "双均线"}
+    }
+
+
+def test_sqlite_round_trip(tmp_path: Path) -> None:
+    """
+    Setting and data saved should be loaded the same after reopening.
+    """
+    filename: str = str(tmp_path.joinpath("cta_strategy.db"))
+    store: SqliteStrategyStore = SqliteStrategyStore(filename)
+
+    store.save_setting("b", create_setting("IF888.CFFEX", 5))
+    store.save_setting("a", create_setting("IC888.CFFEX", 10))
+    store.save_data("a", {"pos": 1, "price": 1.5})
+    store.save_data("b", {"pos": -2})
+
+    # Update keeps order of strategies added
+    store.save_setting("b", create_setting("IF888.CFFEX", 20))
+    store.save_data("a", {"pos": 3, "price": 2.5})
+    store.close()
+
+    store = SqliteStrategyStore(filename)
+    assert list(store.load_setting().items()) == [
+        ("b", create_setting("IF888.CFFEX", 20)),
+        ("a", create_setting("IC888.CFFEX", 10)),
+    ]
+    assert store.load_data(["a", "b", "c"]) == {"a": {"pos": 3, "price": 2.5}, "b": {"pos": -2}}
+
+    store.remove("a")
+    store.flush()
+    store.close()
+
+    store = SqliteStrategyStore(filename)
+    assert list(store.load_setting()) == ["b"]
+    assert store.load_data(["a", "b"]) == {"b": {"pos": -2}}
+    store.close()
+
+
+def test_import_json_once(tmp_path: Path) -> None:
+    """
+    Json files should be imported only once, and missing files not created.
+    """
+    setting_path: Path = tmp_path.joinpath("setting.json")
+    data_path: Path = tmp_path.joinpath("data.json")
+
+    with open(setting_path, mode="w", encoding="UTF-8") as f:
+        json.dump({"a": create_setting("IF888.CFFEX", 5)}, f, ensure_ascii=False)
+
+    store: SqliteStrategyStore = SqliteStrategyStore(str(tmp_path.joinpath("cta_strategy.db")))
+
+    assert store.import_json(str(setting_path), str(data_path))
+    assert not data_path.exists()
+    assert store.get_import_time()
+
+    assert store.load_setting() == {"a": create_setting("IF888.CFFEX", 5)}
+    assert store.load_data(["a"]) == {}
+
+    # Changes of json files are not imported again
+    with open(data_path, mode="w", encoding="UTF-8") as f:
+        json.dump({"a": {"pos": 1}}, f)
+
+    assert not store.import_json(str(setting_path), str(data_path))
+    assert store.load_data(["a"]) == {}
+    store.close()
+
+
+def test_json_round_trip(tmp_path: Path) -> None:
+    """
+    Json store should keep data of strategies not loaded.
+    """
+    setting_filename: str = str(tmp_path.joinpath("setting.json"))
+    data_filename: str = str(tmp_path.joinpath("data.json"))
+
+    store: JsonStrategyStore = JsonStrategyStore(setting_filename, data_filename, write_interval=60)
+    store.load_setting()
+    store.load_data([])
+
+    store.save_setting("a", create_setting("IF888.CFFEX", 5))
+    store.save_data("a", {"pos": 1})
+    store.save_data("b", {"pos": 2})
+    store.close()
+
+    store = JsonStrategyStore(setting_filename, data_filename, write_interval=60)
+    assert store.load_setting() == {"a": create_setting("IF888.CFFEX", 5)}
+    assert store.load_data(["a"]) == {"a": {"pos": 1}}
+
+    store.remove("a")
+    store.close()
+
+    with open(data_filename, encoding="UTF-8") as f:
+        assert json.load(f) == {"b": {"pos": 2}}
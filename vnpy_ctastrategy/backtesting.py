@@ -1,19 +1,27 @@
-from collections import defaultdict
 from datetime import (
     date as Date,
     datetime,
     timedelta
 )
 from typing import cast, Any
-from collections.abc import Callable
+from copy import deepcopy
+from collections.abc import Callable, Iterator
 from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, as_completed
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+from bisect import bisect_left, bisect_right, insort
+from heapq import heappush, heappop, heapify
+from pathlib import Path
 import traceback
 
 import numpy as np
-from pandas import DataFrame, Series
+from pandas import DataFrame, Series, concat
 from pandas.core.window import ExponentialMovingWindow
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from tqdm import tqdm
 from vnpy.trader.constant import (
     Direction,
     Offset,
@@ -37,12 +45,68 @@ from .base import (
     STOPORDER_PREFIX,
     StopOrder,
     StopOrderStatus,
+    AbortSetting,
     INTERVAL_DELTA_MAP
 )
 from .template import CtaTemplate
+from .history import ColumnarData, SharedHistory, datetime_to_int, publish_history, attach_history
+from .bayes import propose_batch
+from .profiler import PhaseProfiler
+from .distributed import (
+    JobQueue,
+    iter_task_results,
+    run_distributed_bf_optimization,
+    run_distributed_ga_optimization
+)
+from .cache import (
+    HistoryCache,
+    EvaluationCache,
+    OptimizationCheckpoint,
+    hash_evaluation,
+    hash_setting,
+    slice_data
+)
 from .locale import _
 
 
+# Target value of evaluation aborted by AbortSetting
+ABORT_TARGET_VALUE: float = -1e9
+
+# Engine methods and strategy callbacks timed when profiling is enabled
+PROFILE_ENGINE_METHODS: tuple[str, ...] = (
+    "load_data",
+    "new_bar",
+    "new_tick",
+    "cross_limit_order",
+    "cross_stop_order",
+    "update_daily_close",
+    "calculate_result",
+)
+PROFILE_REPORT_METHODS: tuple[str, ...] = (
+    "calculate_statistics",
+    "calculate_lean_statistics",
+)
+PROFILE_STRATEGY_METHODS: tuple[str, ...] = (
+    "on_init",
+    "on_bar",
+    "on_tick",
+    "on_order",
+    "on_trade",
+    "on_stop_order",
+)
+
+# Max number of warm-up snapshots kept in each optimization worker process
+WARMUP_SNAPSHOT_SIZE: int = 32
+
+# Number of days in each chunk when loading history data concurrently
+LOAD_CHUNK_DAYS_MAP: dict[Interval, int] = {
+    Interval.TICK: 1,
+    Interval.MINUTE: 30,
+    Interval.HOUR: 180,
+    Interval.DAILY: 3650,
+}
+
+
 class BacktestingEngine:
     """"""
 
@@ -75,15 +139,38 @@ class BacktestingEngine:
         self.interval: Interval
         self.days: int = 0
         self.callback: Callable
-        self.history_data: list = []
+        self.columnar: bool = False
+        self.history_data: list | ColumnarData = []
+        self.history_superset: ColumnarData | None = None
+        self.superset_range: tuple[int, int] | None = None     # time range covered by superset
+        self.shared_memory: SharedMemory | None = None
+        self.history_cache: HistoryCache | None = None
+        self.evaluation_cache: EvaluationCache | None = None
+
+        self.profiler: PhaseProfiler | None = None
+
+        self.abort_setting: AbortSetting | None = None
+        self.aborted: bool = False
+        self.abort_cash: float = 0
+        self.abort_highlevel: float = 0
 
         self.stop_order_count: int = 0
         self.stop_orders: dict[str, StopOrder] = {}
         self.active_stop_orders: dict[str, StopOrder] = {}
 
+        # Heaps of (trigger price, stop order count, stop_orderid), with short
+        # price negated. Cancelled orders are removed lazily.
+        self.long_stop_heap: list[tuple[float, int, str]] = []
+        self.short_stop_heap: list[tuple[float, int, str]] = []
+
         self.limit_order_count: int = 0
         self.limit_orders: dict[str, OrderData] = {}
         self.active_limit_orders: dict[str, OrderData] = {}
+        self.submitting_limit_orders: dict[str, OrderData] = {}
+
+        # Active limit orders of each direction sorted by (price, orderid)
+        self.long_limit_book: list[tuple[float, int, str]] = []
+        self.short_limit_book: list[tuple[float, int, str]] = []
 
         self.trade_count: int = 0
         self.trades: dict[str, TradeData] = {}
@@ -100,10 +187,15 @@ class BacktestingEngine:
         self.stop_order_count = 0
         self.stop_orders.clear()
         self.active_stop_orders.clear()
+        self.long_stop_heap.clear()
+        self.short_stop_heap.clear()
 
         self.limit_order_count = 0
         self.limit_orders.clear()
         self.active_limit_orders.clear()
+        self.submitting_limit_orders.clear()
+        self.long_limit_book.clear()
+        self.short_limit_book.clear()
 
         self.trade_count = 0
         self.trades.clear()
@@ -111,6 +203,10 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
 
+        self.aborted = False
+        self.abort_cash = 0
+        self.abort_highlevel = 0
+
     def set_parameters(
         self,
         vt_symbol: str,
@@ -125,7 +221,8 @@ class BacktestingEngine:
         mode: BacktestingMode = BacktestingMode.BAR,
         risk_free: float = 0,
         annual_days: int = 240,
-        half_life: int = 120
+        half_life: int = 120,
+        columnar: bool = False
     ) -> None:
         """"""
         self.mode = mode
@@ -150,6 +247,60 @@ class BacktestingEngine:
         self.risk_free = risk_free
         self.annual_days = annual_days
         self.half_life = half_life
+        self.columnar = columnar
+
+    def set_history_cache(self, history_cache: HistoryCache | None) -> None:
+        """
+        Set persistent history cache used instead of in-process lru cache.
+        """
+        self.history_cache = history_cache
+
+    def set_evaluation_cache(self, evaluation_cache: EvaluationCache | None) -> None:
+        """
+        Set persistent store of optimization results, so that evaluated
+        settings are skipped in later optimization.
+        """
+        self.evaluation_cache = evaluation_cache
+
+    def set_abort_setting(self, abort_setting: AbortSetting | None) -> None:
+        """
+        Set criteria for aborting backtesting early.
+        """
+        self.abort_setting = abort_setting
+
+    def set_profiling(self, profiling: bool = True) -> None:
+        """
+        Enable or disable timing of backtesting phases and strategy callbacks.
+
+        Records are reset when enabled, and the report is added into
+        statistics under "profile" key after the statistics phase finished.
+        """
+        if profiling:
+            if not self.profiler:
+                self.profiler = PhaseProfiler()
+                self.profiler.wrap(self, PROFILE_ENGINE_METHODS)
+                self.profiler.wrap(self, PROFILE_REPORT_METHODS, report=True)
+
+                if hasattr(self, "strategy"):
+                    self.profiler.wrap(self.strategy, PROFILE_STRATEGY_METHODS)
+
+            self.profiler.clear()
+        elif self.profiler:
+            self.profiler.unwrap(self, PROFILE_ENGINE_METHODS)
+            self.profiler.unwrap(self, PROFILE_REPORT_METHODS)
+
+            if hasattr(self, "strategy"):
+                self.profiler.unwrap(self.strategy, PROFILE_STRATEGY_METHODS)
+
+            self.profiler = None
+
+    def get_profile(self) -> dict[str, dict]:
+        """
+        Get time and call count of each phase, empty if profiling not enabled.
+        """
+        if not self.profiler:
+            return {}
+        return self.profiler.get_report()
 
     def add_strategy(self, strategy_class: type[CtaTemplate], setting: dict) -> None:
         """"""
@@ -158,8 +309,13 @@ class BacktestingEngine:
             self, strategy_class.__name__, self.vt_symbol, setting
         )
 
-    def load_data(self) -> None:
-        """"""
+        if self.profiler:
+            self.profiler.wrap(self.strategy, PROFILE_STRATEGY_METHODS)
+
+    def load_data(self, max_workers: int = 1) -> None:
+        """
+        Load history data, with chunks queried concurrently if max_workers > 1.
+        """
         self.output(_("开始加载历史数据"))
 
         if not self.end:
@@ -169,7 +325,27 @@ class BacktestingEngine:
             self.output(_("起始日期必须小于结束日期"))
             return
 
-        self.history_data.clear()       # Clear previously loaded history data
+        # Clear previously loaded history data
+        if self.columnar:
+            if self.mode == BacktestingMode.BAR:
+                self.history_data = ColumnarData(self.symbol, self.exchange, self.interval)
+            else:
+                self.history_data = ColumnarData(self.symbol, self.exchange, None)
+        elif isinstance(self.history_data, list):
+            self.history_data.clear()
+        else:
+            self.history_data = []
+
+        # Cache fetches only missing gaps, so load the whole range at once
+        if self.history_cache:
+            self.history_data.extend(self.load_history_chunk(self.start, self.end))
+
+            self.output(_("历史数据加载完成，数据量：{}").format(len(self.history_data)))
+            return
+
+        if max_workers > 1:
+            self.load_data_concurrently(max_workers)
+            return
 
         # Load 30 days of data each time and allow for progress update
         total_days: int = (self.end - self.start).days
@@ -187,22 +363,7 @@ class BacktestingEngine:
 
             end = min(end, self.end)  # Make sure end time stays within set range
 
-            if self.mode == BacktestingMode.BAR:
-                data: list[BarData] | list[TickData] = load_bar_data(
-                    self.symbol,
-                    self.exchange,
-                    self.interval,
-                    start,
-                    end
-                )
-            else:
-                data = load_tick_data(
-                    self.symbol,
-                    self.exchange,
-                    start,
-                    end
-                )
-
+            data: list[BarData] | list[TickData] | ColumnarData = self.load_history_chunk(start, end)
             self.history_data.extend(data)
 
             progress += progress_days / total_days
@@ -213,26 +374,141 @@ class BacktestingEngine:
 
         self.output(_("历史数据加载完成，数据量：{}").format(len(self.history_data)))
 
-    def run_backtesting(self) -> None:
-        """"""
+    def get_chunk_ranges(self, chunk_days: int = 0) -> list[tuple[datetime, datetime]]:
+        """
+        Split backtesting period into chunks of [start, end].
+
+        Chunk size adapts to data density of interval if chunk_days not given.
+        """
+        if self.mode == BacktestingMode.BAR:
+            interval: Interval = self.interval
+        else:
+            interval = Interval.TICK
+
+        if not chunk_days:
+            chunk_days = LOAD_CHUNK_DAYS_MAP[interval]
+
+        chunk_delta: timedelta = timedelta(days=chunk_days)
+        interval_delta: timedelta = INTERVAL_DELTA_MAP[interval]
+
+        ranges: list[tuple[datetime, datetime]] = []
+        start: datetime = self.start
+
+        while start < self.end:
+            end: datetime = min(start + chunk_delta, self.end)
+            ranges.append((start, end))
+            start = end + interval_delta
+
+        return ranges
+
+    def load_data_concurrently(self, max_workers: int) -> None:
+        """
+        Query chunks of history data with a bounded thread pool.
+        """
+        ranges: list[tuple[datetime, datetime]] = self.get_chunk_ranges()
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures: list[Future] = [
+                executor.submit(self.load_history_chunk, start, end)
+                for start, end in ranges
+            ]
+
+            for count, __ in enumerate(as_completed(futures), start=1):
+                progress: float = count / len(futures)
+                progress_bar: str = "#" * int(progress * 10)
+                self.output(_("加载进度：{} [{:.0%}]").format(progress_bar, progress))
+
+            # Reassemble chunks in chronological order
+            for future in futures:
+                self.history_data.extend(future.result())
+
+        self.output(_("历史数据加载完成，数据量：{}").format(len(self.history_data)))
+
+    def stream_history(self, chunk_days: int = 0) -> Iterator[list | ColumnarData]:
+        """
+        Generate history data chunk by chunk, prefetching the next chunk in background.
+        """
+        ranges: list[tuple[datetime, datetime]] = self.get_chunk_ranges(chunk_days)
+        if not ranges:
+            return
+
+        with ThreadPoolExecutor(1) as executor:
+            future: Future = executor.submit(self.load_history_chunk, *ranges[0], False)
+
+            for start, end in ranges[1:]:
+                data: list | ColumnarData = future.result()
+                future = executor.submit(self.load_history_chunk, start, end, False)
+                yield data
+
+            yield future.result()
+
+    def load_history_chunk(
+        self,
+        start: datetime,
+        end: datetime,
+        use_lru_cache: bool = True
+    ) -> list[BarData] | list[TickData] | ColumnarData:
+        """
+        Load one chunk of history data within [start, end].
+        """
+        if self.history_cache:
+            if self.mode == BacktestingMode.BAR:
+                return self.history_cache.load_bar_data(
+                    self.symbol, self.exchange, self.interval, start, end
+                )
+            else:
+                return self.history_cache.load_tick_data(
+                    self.symbol, self.exchange, start, end
+                )
+
+        # Columnar and streaming mode keep only part of data in memory, so skip
+        # lru cache which would otherwise hold all the original data objects.
+        if self.columnar or not use_lru_cache:
+            database: BaseDatabase = get_database()
+
+            if self.mode == BacktestingMode.BAR:
+                return database.load_bar_data(self.symbol, self.exchange, self.interval, start, end)
+            else:
+                return database.load_tick_data(self.symbol, self.exchange, start, end)
+
+        if self.mode == BacktestingMode.BAR:
+            return load_bar_data(self.symbol, self.exchange, self.interval, start, end)
+        else:
+            return load_tick_data(self.symbol, self.exchange, start, end)
+
+    def run_backtesting(self, streaming: bool = False, chunk_days: int = 0) -> None:
+        """
+        Replay history data, which is pulled lazily chunk by chunk if streaming.
+        """
         if self.mode == BacktestingMode.BAR:
             func: Callable[[Any], None] = self.new_bar
         else:
             func = self.new_tick
 
-        self.strategy.on_init()
-        self.strategy.inited = True
-        self.output(_("策略初始化完成"))
+        # Strategy cloned from warm-up snapshot is already initialized
+        if not self.strategy.inited:
+            self.init_strategy()
 
         self.strategy.on_start()
         self.strategy.trading = True
         self.output(_("开始回放历史数据"))
 
-        total_size: int = len(self.history_data)
-        batch_size: int = max(int(total_size / 10), 1)
+        batches: Iterator[list | ColumnarData]
 
-        for ix, i in enumerate(range(0, total_size, batch_size)):
-            batch_data: list = self.history_data[i: i + batch_size]
+        if streaming:
+            batch_count: int = len(self.get_chunk_ranges(chunk_days))
+            batches = self.stream_history(chunk_days)
+        else:
+            total_size: int = len(self.history_data)
+            batch_size: int = max(int(total_size / 10), 1)
+
+            batch_count = 10
+            batches = (
+                self.history_data[i: i + batch_size]
+                for i in range(0, total_size, batch_size)
+            )
+
+        for ix, batch_data in enumerate(batches):
             for data in batch_data:
                 try:
                     func(data)
@@ -241,13 +517,144 @@ class BacktestingEngine:
                     self.output(traceback.format_exc())
                     return
 
-            progress = min(ix / 10, 1)
-            progress_bar: str = "=" * (ix + 1)
+                if self.aborted:
+                    self.output(_("触发提前终止条件，回测终止"))
+                    return
+
+            progress = min(ix / batch_count, 1)
+            progress_bar: str = "=" * (int(progress * 10) + 1)
             self.output(_("回放进度：{} [{:.0%}]").format(progress_bar, progress))
 
         self.strategy.on_stop()
         self.output(_("历史数据回放结束"))
 
+    def init_strategy(self) -> None:
+        """
+        Initialize strategy, which replays warm-up data loaded by load_bar/load_tick.
+        """
+        self.strategy.on_init()
+        self.strategy.inited = True
+        self.output(_("策略初始化完成"))
+
+    def create_snapshot(self) -> "BacktestingEngine":
+        """
+        Copy engine together with strategy state, e.g. after initialization.
+
+        History data and caches are shared by reference instead of copied.
+        """
+        memo: dict = {
+            id(obj): obj for obj in (
+                self.history_data,
+                self.history_superset,
+                self.shared_memory,
+                self.history_cache,
+                self.evaluation_cache
+            )
+        }
+
+        snapshot: BacktestingEngine = deepcopy(self, memo)
+        return snapshot
+
+    def clone_snapshot(self, setting: dict) -> "BacktestingEngine":
+        """
+        Create engine from snapshot with strategy parameters updated by setting.
+        """
+        engine: BacktestingEngine = self.create_snapshot()
+        engine.strategy.update_setting(setting)
+        return engine
+
+    def create_child_engine(self, setting: dict) -> "BacktestingEngine":
+        """
+        Create engine with same parameters and history data for one setting.
+        """
+        engine: BacktestingEngine = BacktestingEngine()
+
+        engine.set_parameters(
+            vt_symbol=self.vt_symbol,
+            interval=self.interval,
+            start=self.start,
+            rate=self.rate,
+            slippage=self.slippage,
+            size=self.size,
+            pricetick=self.pricetick,
+            capital=self.capital,
+            end=self.end,
+            mode=self.mode,
+            risk_free=self.risk_free,
+            annual_days=self.annual_days,
+            half_life=self.half_life,
+            columnar=self.columnar
+        )
+        engine.set_history_cache(self.history_cache)
+        engine.set_abort_setting(self.abort_setting)
+        engine.add_strategy(self.strategy_class, setting)
+
+        # Shared by reference, history data is never modified during replay
+        engine.history_data = self.history_data
+        engine.history_superset = self.history_superset
+        engine.superset_range = self.superset_range
+
+        return engine
+
+    def run_batch_backtesting(self, settings: list[dict]) -> list["BacktestingEngine"]:
+        """
+        Replay history data once for multiple settings in lockstep.
+
+        Each setting runs in a child engine with its own orders, trades and
+        daily results, which can be used to calculate result afterwards.
+        """
+        engines: list[BacktestingEngine] = [self.create_child_engine(setting) for setting in settings]
+
+        for engine in engines:
+            engine.strategy.on_init()
+            engine.strategy.inited = True
+        self.output(_("策略初始化完成"))
+
+        for engine in engines:
+            engine.strategy.on_start()
+            engine.strategy.trading = True
+        self.output(_("开始回放历史数据"))
+
+        if self.mode == BacktestingMode.BAR:
+            funcs: dict[BacktestingEngine, Callable[[Any], None]] = {e: e.new_bar for e in engines}
+        else:
+            funcs = {e: e.new_tick for e in engines}
+
+        total_size: int = len(self.history_data)
+        batch_size: int = max(int(total_size / 10), 1)
+
+        for ix, i in enumerate(range(0, total_size, batch_size)):
+            batch_data: list | ColumnarData = self.history_data[i: i + batch_size]
+
+            for data in batch_data:
+                stopped: list[BacktestingEngine] = []
+
+                for engine, func in funcs.items():
+                    try:
+                        func(data)
+                    except Exception:
+                        self.output(_("触发异常，回测终止"))
+                        self.output(traceback.format_exc())
+                        stopped.append(engine)
+                        continue
+
+                    if engine.aborted:
+                        stopped.append(engine)
+
+                # Stop replaying for engines with exception or aborted
+                for engine in stopped:
+                    funcs.pop(engine)
+
+            progress = min(ix / 10, 1)
+            progress_bar: str = "=" * (int(progress * 10) + 1)
+            self.output(_("回放进度：{} [{:.0%}]").format(progress_bar, progress))
+
+        for engine in funcs:
+            engine.strategy.on_stop()
+        self.output(_("历史数据回放结束"))
+
+        return engines
+
     def calculate_result(self) -> DataFrame:
         """"""
         self.output(_("开始计算逐日盯市盈亏"))
@@ -255,43 +662,114 @@ class BacktestingEngine:
         if not self.trades:
             self.output(_("回测成交记录为空"))
 
-        # Add trade data into daily reuslt.
-        for trade in self.trades.values():
-            if not trade.datetime:
-                continue
+        if self.daily_results:
+            self.daily_df = self.calculate_daily_df()
 
-            d: Date = trade.datetime.date()
-            daily_result: DailyResult = self.daily_results[d]
-            daily_result.add_trade(trade)
-
-        # Calculate daily result by iteration.
-        pre_close: float = 0
-        start_pos: float = 0
-
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_close,
-                start_pos,
-                self.size,
-                self.rate,
-                self.slippage
-            )
+        self.output(_("逐日盯市盈亏计算完成"))
+        return self.daily_df
+
+    def calculate_daily_df(self) -> DataFrame:
+        """
+        Calculate daily result with NumPy arrays grouped by trading date.
+        """
+        dates: list[Date] = list(self.daily_results.keys())
+        daily_results: list[DailyResult] = list(self.daily_results.values())
+        day_count: int = len(dates)
+
+        date_index: dict[Date, int] = {d: i for i, d in enumerate(dates)}
+        close_array: np.ndarray = np.array([r.close_price for r in daily_results], dtype=np.float64)
+
+        # Extract trade arrays: date index, signed volume and price
+        trades: list[TradeData] = [t for t in self.trades.values() if t.datetime]
+        trade_lists: list[list[TradeData]] = [[] for d in dates]
+
+        trade_ix_list: list[int] = []
+        for trade in trades:
+            ix: int = date_index[trade.datetime.date()]      # type: ignore
+            trade_ix_list.append(ix)
+            trade_lists[ix].append(trade)
+
+        trade_ix: np.ndarray = np.array(trade_ix_list, dtype=np.int64)
+        volume: np.ndarray = np.array([t.volume for t in trades])
+        price: np.ndarray = np.array([t.price for t in trades], dtype=np.float64)
+        long_mask: np.ndarray = np.array([t.direction == Direction.LONG for t in trades], dtype=bool)
+        pos_change: np.ndarray = np.where(long_mask, volume, -volume)
+
+        # Keep trades grouped by date, with original order inside each day
+        if len(trade_ix) and (np.diff(trade_ix) < 0).any():
+            order: np.ndarray = np.argsort(trade_ix, kind="stable")
+            trade_ix = trade_ix[order]
+            volume = volume[order]
+            price = price[order]
+            pos_change = pos_change[order]
+
+        # Position at the end of each day
+        if len(trade_ix):
+            position: np.ndarray = np.cumsum(pos_change)
+            last_ix: np.ndarray = np.searchsorted(trade_ix, np.arange(day_count), side="right") - 1
+            end_pos: np.ndarray = np.where(last_ix >= 0, position[last_ix], 0)
+        else:
+            end_pos = np.zeros(day_count)
+
+        start_pos: np.ndarray = np.concatenate(([0], end_pos[:-1]))
 
-            pre_close = daily_result.close_price
-            start_pos = daily_result.end_pos
+        # If no pre_close provided on the first day,
+        # use value 1 to avoid zero division error
+        pre_close: np.ndarray = np.concatenate(([0], close_array[:-1]))
+        pre_close[pre_close == 0] = 1
 
-        # Generate dataframe
-        results: defaultdict = defaultdict(list)
+        # Holding pnl is the pnl from holding position at day start
+        holding_pnl: np.ndarray = start_pos * (close_array - pre_close) * self.size
 
-        for daily_result in self.daily_results.values():
-            for key, value in daily_result.__dict__.items():
-                results[key].append(value)
+        # Trading pnl is the pnl from new trade during the day
+        trade_turnover: np.ndarray = volume * self.size * price
 
-        if results:
-            self.daily_df = DataFrame.from_dict(results).set_index("date")
+        trade_count: np.ndarray = np.bincount(trade_ix, minlength=day_count)
+        trading_pnl: np.ndarray = np.bincount(
+            trade_ix,
+            weights=pos_change * (close_array[trade_ix] - price) * self.size,
+            minlength=day_count
+        )
+        turnover: np.ndarray = np.bincount(trade_ix, weights=trade_turnover, minlength=day_count)
+        commission: np.ndarray = np.bincount(trade_ix, weights=trade_turnover * self.rate, minlength=day_count)
+        slippage: np.ndarray = np.bincount(
+            trade_ix,
+            weights=volume * self.size * self.slippage,
+            minlength=day_count
+        )
 
-        self.output(_("逐日盯市盈亏计算完成"))
-        return self.daily_df
+        # Net pnl takes account of commission and slippage cost
+        total_pnl: np.ndarray = trading_pnl + holding_pnl
+        net_pnl: np.ndarray = total_pnl - commission - slippage
+
+        results: dict[str, Any] = {
+            "date": dates,
+            "close_price": close_array,
+            "pre_close": pre_close,
+            "trades": trade_lists,
+            "trade_count": trade_count,
+            "start_pos": start_pos,
+            "end_pos": end_pos,
+            "turnover": turnover,
+            "commission": commission,
+            "slippage": slippage,
+            "trading_pnl": trading_pnl,
+            "holding_pnl": holding_pnl,
+            "total_pnl": total_pnl,
+            "net_pnl": net_pnl,
+        }
+
+        # Update daily result objects for get_all_daily_results
+        columns: dict[str, list] = {
+            key: value if isinstance(value, list) else value.tolist()
+            for key, value in results.items()
+        }
+
+        for i, daily_result in enumerate(daily_results):
+            for key, values in columns.items():
+                setattr(daily_result, key, values[i])
+
+        return DataFrame(results).set_index("date")
 
     def calculate_statistics(
         self,
@@ -525,6 +1003,30 @@ class BacktestingEngine:
         self.output(_("策略统计指标计算完成"))
         return statistics
 
+    def calculate_lean_statistics(self, target_name: str = "") -> dict:
+        """
+        Calculate statistics with NumPy only, used by optimization.
+        """
+        df: DataFrame = self.daily_df
+        if df.empty:
+            return {}
+
+        statistics: dict = calculate_statistics_array(
+            df["net_pnl"].to_numpy(),
+            self.capital,
+            self.risk_free,
+            self.annual_days,
+            self.half_life,
+            dates=df.index.tolist(),
+            commission=df["commission"].to_numpy(),
+            slippage=df["slippage"].to_numpy(),
+            turnover=df["turnover"].to_numpy(),
+            trade_count=df["trade_count"].to_numpy(),
+            target_name=target_name
+        )
+
+        return statistics
+
     def show_chart(self, df: DataFrame | None = None) -> go.Figure:
         """"""
         # Check DataFrame input exterior
@@ -572,30 +1074,221 @@ class BacktestingEngine:
         self,
         optimization_setting: OptimizationSetting,
         output: bool = True,
-        max_workers: int | None = None
+        max_workers: int | None = None,
+        share_history: bool = False,
+        batch_size: int = 1,
+        abort_setting: AbortSetting | None = None,
+        job_queue: JobQueue | None = None,
+        checkpoint_path: str | Path | None = None,
+        callback: Callable[[tuple], None] | None = None,
+        warmup_days: int | None = None
     ) -> list:
-        """"""
+        """
+        Run brute force optimization, with batch_size settings replayed in
+        lockstep by each worker task if batch_size > 1.
+
+        Days of warm-up data published with share_history are detected from
+        the strategy if warmup_days is not given (see publish_history).
+
+        If job_queue is given, settings are evaluated one by one by workers
+        pulling jobs from the queue instead of local processes. Shared history
+        can then only be used by workers running on the same host.
+
+        If checkpoint_path or callback is given, results are streamed by
+        iter_bf_optimization and passed to callback as they complete.
+        """
+        if job_queue:
+            batch_size = 1
+
         if not check_optimization_setting(optimization_setting):
             return []
 
-        evaluate_func: Callable = wrap_evaluate(self, optimization_setting.target_name)
-        results: list = run_bf_optimization(
-            evaluate_func,
-            optimization_setting,
-            get_target_value,
-            max_workers=max_workers,
-            output=self.output
-        )
+        if checkpoint_path or callback:
+            start: float = perf_counter()
+
+            results: list = []
+            for result in self.iter_bf_optimization(
+                optimization_setting,
+                max_workers=max_workers,
+                share_history=share_history,
+                batch_size=batch_size,
+                abort_setting=abort_setting,
+                job_queue=job_queue,
+                checkpoint_path=checkpoint_path,
+                warmup_days=warmup_days
+            ):
+                results.append(result)
+
+                if callback:
+                    callback(result)
+
+            results.sort(reverse=True, key=get_target_value)
+
+            cost: int = int(perf_counter() - start)
+            self.output(_("穷举算法优化完成，耗时{}秒").format(cost))
+
+            if output:
+                for result in results:
+                    msg: str = _("参数：{}, 目标：{}").format(result[0], result[1])
+                    self.output(msg)
+
+            return results
+
+        try:
+            history: SharedHistory | None = None
+            if share_history:
+                history = self.publish_history(warmup_days)
+
+            evaluate_func: Callable = wrap_evaluate(
+                self,
+                optimization_setting.target_name,
+                history=history,
+                batch=batch_size > 1,
+                abort_setting=abort_setting
+            )
+
+            if job_queue:
+                results = run_distributed_bf_optimization(
+                    evaluate_func,
+                    optimization_setting,
+                    get_target_value,
+                    job_queue,
+                    output=self.output
+                )
+            elif batch_size > 1:
+                results = run_batch_optimization(
+                    evaluate_func,
+                    optimization_setting,
+                    get_target_value,
+                    batch_size,
+                    max_workers=max_workers,
+                    output=self.output
+                )
+            else:
+                results = run_bf_optimization(
+                    evaluate_func,
+                    optimization_setting,
+                    get_target_value,
+                    max_workers=max_workers,
+                    output=self.output
+                )
+        finally:
+            self.release_history()
 
         if output:
             for result in results:
-                msg: str = _("参数：{}, 目标：{}").format(result[0], result[1])
+                msg = _("参数：{}, 目标：{}").format(result[0], result[1])
                 self.output(msg)
 
         return results
 
     run_optimization = run_bf_optimization
 
+    def iter_bf_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        max_workers: int | None = None,
+        share_history: bool = False,
+        batch_size: int = 1,
+        abort_setting: AbortSetting | None = None,
+        job_queue: JobQueue | None = None,
+        checkpoint_path: str | Path | None = None,
+        warmup_days: int | None = None
+    ) -> Iterator[tuple]:
+        """
+        Run brute force optimization and yield results in completion order,
+        with batch_size settings replayed in lockstep by each worker task if
+        batch_size > 1 (not used with job_queue).
+
+        If checkpoint_path is given, every result is appended into the file,
+        and results already recorded by the same optimization are yielded
+        first without being evaluated again.
+        """
+        if not check_optimization_setting(optimization_setting):
+            return
+
+        target_name: str = optimization_setting.target_name
+        settings: list[dict] = optimization_setting.generate_settings()
+
+        checkpoint: OptimizationCheckpoint | None = None
+        recorded: list[tuple] = []
+
+        if checkpoint_path:
+            checkpoint = OptimizationCheckpoint(
+                checkpoint_path,
+                get_evaluation_prefix(self, target_name, abort_setting)
+            )
+            recorded = checkpoint.load()
+
+        recorded_keys: set[str] = {hash_setting("", r[0]) for r in recorded}
+        pending: list[dict] = [s for s in settings if hash_setting("", s) not in recorded_keys]
+
+        self.output(_("开始执行穷举算法优化"))
+        self.output(_("参数优化空间：{}").format(len(settings)))
+        if recorded:
+            self.output(_("已记录结果数量：{}，待优化数量：{}").format(len(recorded), len(pending)))
+
+        yield from recorded
+
+        if not pending:
+            return
+
+        if job_queue:
+            batch_size = 1
+
+        executor: ProcessPoolExecutor | None = None
+        task_id: int = 0
+
+        # Shared memory is released even if publishing fails halfway
+        try:
+            history: SharedHistory | None = None
+            if share_history:
+                history = self.publish_history(warmup_days)
+
+            evaluate_func: Callable = wrap_evaluate(
+                self,
+                target_name,
+                history=history,
+                batch=batch_size > 1,
+                abort_setting=abort_setting
+            )
+
+            results: Iterator[tuple]
+
+            if job_queue:
+                task_id = job_queue.create_task(evaluate_func, pending)
+                results = iter_task_results(job_queue, task_id, pending, self.output)
+            else:
+                executor = ProcessPoolExecutor(max_workers, mp_context=get_context("spawn"))
+
+                if batch_size > 1:
+                    batches: list[list[dict]] = [
+                        pending[i: i + batch_size] for i in range(0, len(pending), batch_size)
+                    ]
+                    futures: list[Future] = [executor.submit(evaluate_func, b) for b in batches]
+                    results = (r for f in as_completed(futures) for r in f.result())
+                else:
+                    futures = [executor.submit(evaluate_func, s) for s in pending]
+                    results = (f.result() for f in as_completed(futures))
+
+            for result in tqdm(results, total=len(pending)):
+                if checkpoint:
+                    checkpoint.append(result)
+
+                yield result
+        finally:
+            # Pending evaluations are dropped if iteration stops early
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+            if job_queue and task_id:
+                job_queue.remove_task(task_id)
+
+            if checkpoint:
+                checkpoint.close()
+
+            self.release_history()
+
     def run_ga_optimization(
         self,
         optimization_setting: OptimizationSetting,
@@ -607,34 +1300,569 @@ class BacktestingEngine:
         lambda_: int | None = None,
         cxpb: float = 0.95,
         mutpb: float | None = None,
-        indpb: float = 1.0
+        indpb: float = 1.0,
+        share_history: bool = False,
+        abort_setting: AbortSetting | None = None,
+        job_queue: JobQueue | None = None
     ) -> list:
         """"""
         if not check_optimization_setting(optimization_setting):
             return []
 
-        evaluate_func: Callable = wrap_evaluate(self, optimization_setting.target_name)
-        results: list = run_ga_optimization(
-            evaluate_func,
-            optimization_setting,
-            get_target_value,
-            max_workers=max_workers,
-            pop_size=pop_size,
-            ngen=ngen,
-            mu=mu,
-            lambda_=lambda_,
-            cxpb=cxpb,
-            mutpb=mutpb,
-            indpb=indpb,
-            output=self.output
-        )
+        try:
+            history: SharedHistory | None = None
+            if share_history:
+                history = self.publish_history()
+
+            evaluate_func: Callable = wrap_evaluate(
+                self,
+                optimization_setting.target_name,
+                history=history,
+                abort_setting=abort_setting
+            )
+
+            if job_queue:
+                results: list = run_distributed_ga_optimization(
+                    evaluate_func,
+                    optimization_setting,
+                    get_target_value,
+                    job_queue,
+                    pop_size=pop_size,
+                    ngen=ngen,
+                    mu=mu,
+                    lambda_=lambda_,
+                    cxpb=cxpb,
+                    mutpb=mutpb,
+                    indpb=indpb,
+                    output=self.output
+                )
+            else:
+                results = run_ga_optimization(
+                    evaluate_func,
+                    optimization_setting,
+                    get_target_value,
+                    max_workers=max_workers,
+                    pop_size=pop_size,
+                    ngen=ngen,
+                    mu=mu,
+                    lambda_=lambda_,
+                    cxpb=cxpb,
+                    mutpb=mutpb,
+                    indpb=indpb,
+                    output=self.output
+                )
+        finally:
+            self.release_history()
+
+        if output:
+            for result in results:
+                msg: str = _("参数：{}, 目标：{}").format(result[0], result[1])
+                self.output(msg)
+
+        return results
+
+    def run_sh_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        output: bool = True,
+        max_workers: int | None = None,
+        eta: int = 3,
+        min_ratio: float = 0.1,
+        leaderboard_size: int = 10,
+        share_history: bool = False,
+        abort_setting: AbortSetting | None = None
+    ) -> list:
+        """
+        Run successive halving optimization.
+
+        All settings are first evaluated on the beginning min_ratio part of
+        backtesting period. Top 1/eta of them are kept and evaluated again on
+        a period eta times longer, until the full period is reached.
+        """
+        if not check_optimization_setting(optimization_setting):
+            return []
+
+        if eta < 2 or not 0 < min_ratio <= 1:
+            self.output(_("逐次减半参数错误，eta需大于等于2，min_ratio需在0到1之间"))
+            return []
+
+        target_name: str = optimization_setting.target_name
+        settings: list[dict] = optimization_setting.generate_settings()
+
+        # Period ratio of each round, ending with the full period
+        ratios: list[float] = []
+        ratio: float = min_ratio
+
+        while ratio < 1:
+            ratios.append(ratio)
+            ratio *= eta
+        ratios.append(1)
+
+        self.output(_("开始执行逐次减半算法优化"))
+        self.output(_("参数优化空间：{}").format(len(settings)))
+        self.output(_("优化轮数：{}").format(len(ratios)))
+
+        start: float = perf_counter()
+        total_delta: timedelta = self.end - self.start
+        results: list = []
+
+        try:
+            history: SharedHistory | None = None
+            if share_history:
+                history = self.publish_history()
+
+            with ProcessPoolExecutor(max_workers, mp_context=get_context("spawn")) as executor:
+                for i, ratio in enumerate(ratios):
+                    # Keep top 1/eta of last round results
+                    if results:
+                        count: int = max(int(np.ceil(len(results) / eta)), 1)
+                        settings = [result[0] for result in results[:count]]
+
+                    end: datetime = self.start + total_delta * ratio
+
+                    self.output(_("第{}轮优化，回测区间：{} - {}，参数数量：{}").format(
+                        i + 1, self.start.date(), end.date(), len(settings)
+                    ))
+
+                    evaluate_func: Callable = wrap_evaluate(
+                        self,
+                        target_name,
+                        history=history,
+                        abort_setting=abort_setting,
+                        end=end
+                    )
+
+                    it: Iterator = tqdm(executor.map(evaluate_func, settings), total=len(settings))
+                    results = list(it)
+                    results.sort(reverse=True, key=get_target_value)
+
+                    for result in results[:leaderboard_size]:
+                        self.output(_("参数：{}, 目标：{}").format(result[0], result[1]))
+        finally:
+            self.release_history()
+
+        cost: int = int(perf_counter() - start)
+        self.output(_("逐次减半算法优化完成，耗时{}秒").format(cost))
+
+        if output:
+            for result in results:
+                msg: str = _("参数：{}, 目标：{}").format(result[0], result[1])
+                self.output(msg)
+
+        return results
+
+    def run_bayes_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        output: bool = True,
+        max_workers: int | None = None,
+        max_evaluations: int = 200,
+        n_initial: int = 20,
+        batch_size: int = 8,
+        n_candidates: int = 5000,
+        seed: int | None = None,
+        share_history: bool = False,
+        abort_setting: AbortSetting | None = None
+    ) -> list:
+        """
+        Run Bayesian optimization with Gaussian process surrogate model.
+
+        After n_initial random settings, each round proposes batch_size
+        settings on the parameter grid by expected improvement, which are
+        evaluated in parallel, until max_evaluations is reached.
+        """
+        if not check_optimization_setting(optimization_setting):
+            return []
+
+        target_name: str = optimization_setting.target_name
+
+        names: list[str] = list(optimization_setting.params.keys())
+        values: list[list] = list(optimization_setting.params.values())
+        sizes: np.ndarray = np.array([len(v) for v in values])
+        scales: np.ndarray = np.maximum(sizes - 1, 1)
+
+        total_size: int = int(np.prod(sizes.astype(float)))
+        max_evaluations = min(max_evaluations, total_size)
+
+        self.output(_("开始执行贝叶斯算法优化"))
+        self.output(_("参数优化空间：{}").format(total_size))
+        self.output(_("最大评估次数：{}").format(max_evaluations))
+
+        rng: np.random.Generator = np.random.default_rng(seed)
+
+        # Each setting is represented by value indexes of all parameters
+        evaluated: dict[tuple, tuple] = {}
+
+        def sample_candidates() -> np.ndarray:
+            """
+            Get candidate indexes not evaluated yet.
+            """
+            if total_size <= n_candidates:
+                candidates: np.ndarray = np.indices(sizes.tolist()).reshape(len(sizes), -1).T
+            else:
+                candidates = rng.integers(0, sizes, size=(n_candidates, len(sizes)))
+
+                # Add neighbours of best settings for local refinement
+                best: list[tuple] = sorted(evaluated, key=lambda k: evaluated[k][1], reverse=True)[:5]
+                neighbours: list[np.ndarray] = []
+
+                for key in best:
+                    for i in range(len(sizes)):
+                        for step in (-1, 1):
+                            neighbour: np.ndarray = np.array(key)
+                            neighbour[i] += step
+                            if 0 <= neighbour[i] < sizes[i]:
+                                neighbours.append(neighbour)
+
+                if neighbours:
+                    candidates = np.vstack([candidates, neighbours])
+
+                candidates = np.unique(candidates, axis=0)
+
+            mask: np.ndarray = np.array([tuple(c) not in evaluated for c in candidates.tolist()], dtype=bool)
+            return cast(np.ndarray, candidates[mask])
+
+        start: float = perf_counter()
+
+        try:
+            history: SharedHistory | None = None
+            if share_history:
+                history = self.publish_history()
+
+            evaluate_func: Callable = wrap_evaluate(
+                self,
+                target_name,
+                history=history,
+                abort_setting=abort_setting
+            )
+
+            with ProcessPoolExecutor(max_workers, mp_context=get_context("spawn")) as executor:
+                round_count: int = 0
+
+                while len(evaluated) < max_evaluations:
+                    candidates: np.ndarray = sample_candidates()
+                    if not len(candidates):
+                        break
+
+                    count: int = min(batch_size, max_evaluations - len(evaluated))
+
+                    if len(evaluated) < n_initial:
+                        count = min(n_initial - len(evaluated), max_evaluations - len(evaluated))
+                        chosen: list[int] = rng.permutation(len(candidates))[:count].tolist()
+                    else:
+                        keys: list[tuple] = list(evaluated.keys())
+                        x: np.ndarray = np.array(keys) / scales
+                        y: np.ndarray = np.array([evaluated[k][1] for k in keys], dtype=float)
+
+                        # Aborted values are replaced by worst normal value to keep model stable
+                        aborted: np.ndarray = y <= ABORT_TARGET_VALUE
+                        if aborted.all():
+                            y[:] = 0
+                        elif aborted.any():
+                            y[aborted] = y[~aborted].min()
+
+                        chosen = propose_batch(x, y, candidates / scales, count)
+
+                    batch_keys: list[tuple] = [tuple(candidates[i].tolist()) for i in chosen]
+                    settings: list[dict] = [
+                        {name: values[i][ix] for i, (name, ix) in enumerate(zip(names, key, strict=True))}
+                        for key in batch_keys
+                    ]
+
+                    for key, result in zip(batch_keys, executor.map(evaluate_func, settings), strict=True):
+                        evaluated[key] = result
+
+                    round_count += 1
+                    best_result: tuple = max(evaluated.values(), key=get_target_value)
+                    self.output(_("第{}轮优化，已评估：{}，当前最优参数：{}, 目标：{}").format(
+                        round_count, len(evaluated), best_result[0], best_result[1]
+                    ))
+        finally:
+            self.release_history()
+
+        cost: int = int(perf_counter() - start)
+        self.output(_("贝叶斯算法优化完成，耗时{}秒").format(cost))
+
+        results: list = list(evaluated.values())
+        results.sort(reverse=True, key=get_target_value)
+
+        if output:
+            for result in results:
+                msg: str = _("参数：{}, 目标：{}").format(result[0], result[1])
+                self.output(msg)
+
+        return results
+
+    def run_walk_forward_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        train_days: int,
+        test_days: int,
+        max_workers: int | None = None,
+        abort_setting: AbortSetting | None = None
+    ) -> DataFrame:
+        """
+        Run walk-forward optimization with rolling train/test windows.
+
+        Each train window is optimized by brute force, and the best setting is
+        backtested on the following test window. Jobs of all windows run in
+        one process pool with history data shared. Daily results of test
+        windows are stitched into daily_df for calculate_statistics.
+        """
+        if not check_optimization_setting(optimization_setting):
+            return DataFrame()
+
+        target_name: str = optimization_setting.target_name
+        settings: list[dict] = optimization_setting.generate_settings()
+
+        # Split period into windows of (train_start, train_end, test_start, test_end)
+        windows: list[tuple[datetime, datetime, datetime, datetime]] = []
+        train_start: datetime = self.start
+
+        while True:
+            train_end: datetime = train_start + timedelta(days=train_days - 1)
+            test_start: datetime = train_start + timedelta(days=train_days)
+            test_end: datetime = min(test_start + timedelta(days=test_days - 1), self.end)
+
+            if test_start > self.end:
+                break
+
+            windows.append((train_start, train_end, test_start, test_end))
+            train_start += timedelta(days=test_days)
+
+        if not windows:
+            self.output(_("回测区间不足一个滚动窗口，请检查"))
+            return DataFrame()
+
+        self.output(_("开始执行滚动优化"))
+        self.output(_("参数优化空间：{}").format(len(settings)))
+        self.output(_("滚动窗口数量：{}").format(len(windows)))
+
+        start: float = perf_counter()
+
+        try:
+            history: SharedHistory = self.publish_history()
+
+            with ProcessPoolExecutor(max_workers, mp_context=get_context("spawn")) as executor:
+                # Optimize all train windows in the same pool
+                futures: dict[Future, int] = {}
+
+                for ix, (train_start, train_end, __, __) in enumerate(windows):
+                    evaluate_func: Callable = wrap_evaluate(
+                        self,
+                        target_name,
+                        history=history,
+                        abort_setting=abort_setting,
+                        start=train_start,
+                        end=train_end
+                    )
+
+                    for setting in settings:
+                        futures[executor.submit(evaluate_func, setting)] = ix
+
+                train_results: list[list[tuple]] = [[] for __ in windows]
+
+                for future in tqdm(as_completed(futures), total=len(futures)):
+                    train_results[futures[future]].append(future.result())
+
+                best_results: list[tuple] = [
+                    max(results, key=get_target_value) for results in train_results
+                ]
+
+                # Backtest best setting of each window on test period
+                test_futures: list[Future] = []
+
+                for (__, __, test_start, test_end), best_result in zip(windows, best_results, strict=True):
+                    test_futures.append(executor.submit(
+                        run_daily_backtesting,
+                        self.strategy_class,
+                        self.vt_symbol,
+                        self.interval,
+                        test_start,
+                        self.rate,
+                        self.slippage,
+                        self.size,
+                        self.pricetick,
+                        self.capital,
+                        test_end,
+                        self.mode,
+                        best_result[0],
+                        history=history,
+                        history_cache=self.history_cache
+                    ))
+
+                daily_dfs: list[DataFrame] = [future.result() for future in test_futures]
+        finally:
+            self.release_history()
+
+        for ix, (window, best_result) in enumerate(zip(windows, best_results, strict=True)):
+            train_start, train_end, test_start, test_end = window
+
+            self.output(_("窗口{}，训练区间：{} - {}，测试区间：{} - {}，参数：{}，目标：{}").format(
+                ix + 1,
+                train_start.date(),
+                train_end.date(),
+                test_start.date(),
+                test_end.date(),
+                best_result[0],
+                best_result[1]
+            ))
+
+        cost: int = int(perf_counter() - start)
+        self.output(_("滚动优化完成，耗时{}秒").format(cost))
+
+        daily_dfs = [df for df in daily_dfs if not df.empty]
+        if daily_dfs:
+            self.daily_df = concat(daily_dfs)
+        else:
+            self.daily_df = DataFrame()
+
+        return self.daily_df
+
+    def publish_history(self, warmup_days: int | None = None) -> SharedHistory:
+        """
+        Load history data once and publish it into shared memory.
+
+        Worker processes of optimization attach to the published block
+        instead of querying database for every evaluation. Data of warmup_days
+        before start is also published for load_bar/load_tick in on_init,
+        detected from the strategy added if not given.
+
+        Warm-up period already included in history_data (e.g. given by caller)
+        is not loaded again, and the rest is taken from history_superset if it
+        covers the period, otherwise loaded through history_cache or database.
+        """
+        self.release_history()
+
+        if not self.history_data:
+            self.load_data()
+
+        if self.mode == BacktestingMode.BAR:
+            data: ColumnarData = ColumnarData(self.symbol, self.exchange, self.interval)
+            interval: Interval | None = self.interval
+            interval_delta: timedelta = INTERVAL_DELTA_MAP[self.interval]
+        else:
+            data = ColumnarData(self.symbol, self.exchange, None)
+            interval = None
+            interval_delta = timedelta(seconds=1)
+
+        if warmup_days is None:
+            warmup_days = self.detect_warmup_days()
+
+        warmup_start: datetime = self.start - timedelta(days=warmup_days)
+        warmup_end: datetime = self.start - interval_delta
+        covered_start: int = datetime_to_int(warmup_start)
+
+        # Data before start in history_data is published as it is
+        if self.history_data:
+            first: datetime = self.history_data[0].datetime
+
+            if datetime_to_int(first) < datetime_to_int(self.start):
+                warmup_end = first - interval_delta
+                covered_start = min(covered_start, datetime_to_int(first))
+
+        if datetime_to_int(warmup_start) <= datetime_to_int(warmup_end):
+            warmup_data: list | ColumnarData | None = self.load_superset_data(
+                self.vt_symbol, interval, warmup_start, warmup_end
+            )
+
+            if warmup_data is None:
+                warmup_data = self.load_history_chunk(warmup_start, warmup_end)
+
+            data.extend(warmup_data)
+
+        data.extend(self.history_data)
+
+        self.shared_memory, history = publish_history(data, covered_start, datetime_to_int(self.end))
+
+        self.output(_("历史数据发布到共享内存，数据量：{}").format(history.length))
+        return history
+
+    def use_shared_history(self, history: SharedHistory) -> None:
+        """
+        Attach to published history data and keep part within start/end.
+        """
+        data: ColumnarData = attach_history(history)
+
+        # Whole published data is kept for serving warm-up data of load_bar
+        self.history_superset = data
+        if history.end:
+            self.superset_range = (history.start, history.end)
+        else:
+            self.superset_range = None
+
+        self.history_data = slice_data(data, datetime_to_int(self.start), datetime_to_int(self.end))
+
+    def detect_warmup_days(self) -> int:
+        """
+        Detect days of history loaded by on_init of the strategy added.
+        """
+        engine: BacktestingEngine = self.create_child_engine(self.strategy.get_parameters())
+        recorded: list[int] = [0]
+
+        def record_days(vt_symbol: str, days: int, *args: Any) -> list:
+            """"""
+            recorded.append(days)
+            return []
+
+        # Only record days requested instead of loading data
+        engine.load_bar = record_days         # type: ignore
+        engine.load_tick = record_days        # type: ignore
+
+        # Days recorded before exception are still used
+        try:
+            engine.strategy.on_init()
+        except Exception:
+            self.output(_("策略{}预热数据检测失败：{}").format(
+                self.strategy.strategy_name,
+                traceback.format_exc()
+            ))
+
+        return max(recorded)
+
+    def load_superset_data(
+        self,
+        vt_symbol: str,
+        interval: Interval | None,
+        start: datetime,
+        end: datetime
+    ) -> list | None:
+        """
+        Get data from attached shared history, or None if range is not covered.
+        """
+        data: ColumnarData | None = self.history_superset
+
+        if (
+            not data
+            or vt_symbol != self.vt_symbol
+            or interval != data.interval
+        ):
+            return None
+
+        start_int: int = datetime_to_int(start)
+        end_int: int = datetime_to_int(end)
 
-        if output:
-            for result in results:
-                msg: str = _("参数：{}, 目标：{}").format(result[0], result[1])
-                self.output(msg)
+        # Without range known, only period between first and last data is covered
+        if self.superset_range:
+            covered_start, covered_end = self.superset_range
+        else:
+            covered_start, covered_end = int(data.datetimes[0]), int(data.datetimes[-1])
 
-        return results
+        if covered_start > start_int or covered_end < end_int:
+            return None
+
+        return slice_data(data, start_int, end_int).to_list()
+
+    def release_history(self) -> None:
+        """
+        Release shared memory published by this engine.
+        """
+        if not self.shared_memory:
+            return
+
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+        self.shared_memory = None
 
     def update_daily_close(self, price: float) -> None:
         """"""
@@ -657,6 +1885,9 @@ class BacktestingEngine:
 
         self.update_daily_close(bar.close_price)
 
+        if self.abort_setting:
+            self.check_abort(bar.close_price)
+
     def new_tick(self, tick: TickData) -> None:
         """"""
         self.tick = tick
@@ -668,6 +1899,47 @@ class BacktestingEngine:
 
         self.update_daily_close(tick.last_price)
 
+        if self.abort_setting:
+            self.check_abort(tick.last_price)
+
+    def update_abort_cash(self, trade: TradeData) -> None:
+        """
+        Update cash flow of trades used for mark-to-market balance.
+        """
+        turnover: float = trade.volume * self.size * trade.price
+
+        if trade.direction == Direction.LONG:
+            self.abort_cash -= turnover
+        else:
+            self.abort_cash += turnover
+
+        self.abort_cash -= turnover * self.rate
+        self.abort_cash -= trade.volume * self.size * self.slippage
+
+    def check_abort(self, price: float) -> None:
+        """
+        Check abort criteria with running mark-to-market balance.
+        """
+        abort_setting: AbortSetting = cast(AbortSetting, self.abort_setting)
+
+        if abort_setting.max_trade_count and self.trade_count > abort_setting.max_trade_count:
+            self.aborted = True
+            return
+
+        balance: float = self.capital + self.abort_cash + self.strategy.pos * price * self.size
+
+        if abort_setting.min_balance and balance < abort_setting.min_balance:
+            self.aborted = True
+            return
+
+        self.abort_highlevel = max(self.abort_highlevel, balance, self.capital)
+
+        # Drawdown percent is undefined without positive high level
+        if abort_setting.max_ddpercent and self.abort_highlevel > 0:
+            ddpercent: float = (balance - self.abort_highlevel) / self.abort_highlevel * 100
+            if ddpercent < -abort_setting.max_ddpercent:
+                self.aborted = True
+
     def cross_limit_order(self) -> None:
         """
         Cross limit order with last bar/tick data.
@@ -683,10 +1955,11 @@ class BacktestingEngine:
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for order in list(self.active_limit_orders.values()):
+        for order in self.get_crossed_limit_orders(long_cross_price, short_cross_price):
             # Push order update with status "not traded" (pending).
             if order.status == Status.SUBMITTING:
                 order.status = Status.NOTTRADED
+                self.submitting_limit_orders.pop(order.vt_orderid, None)
                 self.strategy.on_order(order)
 
             # Check whether limit orders can be filled.
@@ -712,6 +1985,7 @@ class BacktestingEngine:
 
             if order.vt_orderid in self.active_limit_orders:
                 self.active_limit_orders.pop(order.vt_orderid)
+                self.remove_limit_book(order)
 
             # Push trade update
             self.trade_count += 1
@@ -741,6 +2015,54 @@ class BacktestingEngine:
 
             self.trades[trade.vt_tradeid] = trade
 
+            if self.abort_setting:
+                self.update_abort_cash(trade)
+
+    def get_crossed_limit_orders(
+        self,
+        long_cross_price: float,
+        short_cross_price: float
+    ) -> list[OrderData]:
+        """
+        Get limit orders to be checked in cross_limit_order.
+
+        Only orders still submitting or with price crossed are returned,
+        sorted by orderid which is the same as sending sequence.
+        """
+        orders: dict[str, OrderData] = dict(self.submitting_limit_orders)
+
+        if long_cross_price > 0:
+            ix: int = bisect_left(self.long_limit_book, (long_cross_price,))
+            for __, __, vt_orderid in self.long_limit_book[ix:]:
+                orders[vt_orderid] = self.active_limit_orders[vt_orderid]
+
+        if short_cross_price > 0:
+            ix = bisect_right(self.short_limit_book, (short_cross_price, float("inf")))
+            for __, __, vt_orderid in self.short_limit_book[:ix]:
+                orders[vt_orderid] = self.active_limit_orders[vt_orderid]
+
+        if len(orders) > 1:
+            return sorted(orders.values(), key=lambda order: int(order.orderid))
+        return list(orders.values())
+
+    def remove_limit_book(self, order: OrderData) -> None:
+        """
+        Remove limit order from submitting dict and price sorted book.
+        """
+        self.submitting_limit_orders.pop(order.vt_orderid, None)
+
+        if order.direction == Direction.LONG:
+            book: list[tuple[float, int, str]] = self.long_limit_book
+        elif order.direction == Direction.SHORT:
+            book = self.short_limit_book
+        else:
+            return
+
+        key: tuple[float, int, str] = (order.price, int(order.orderid), order.vt_orderid)
+        ix: int = bisect_left(book, key)
+        if ix < len(book) and book[ix] == key:
+            del book[ix]
+
     def cross_stop_order(self) -> None:
         """
         Cross stop order with last bar/tick data.
@@ -756,7 +2078,7 @@ class BacktestingEngine:
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for stop_order in list(self.active_stop_orders.values()):
+        for stop_order in self.get_triggered_stop_orders(long_cross_price, short_cross_price):
             # Check whether stop order can be triggered.
             long_cross: bool = (
                 stop_order.direction == Direction.LONG
@@ -815,6 +2137,9 @@ class BacktestingEngine:
 
             self.trades[trade.vt_tradeid] = trade
 
+            if self.abort_setting:
+                self.update_abort_cash(trade)
+
             # Update stop order.
             stop_order.vt_orderids.append(order.vt_orderid)
             stop_order.status = StopOrderStatus.TRIGGERED
@@ -829,6 +2154,53 @@ class BacktestingEngine:
             self.strategy.pos += pos_change
             self.strategy.on_trade(trade)
 
+    def get_triggered_stop_orders(
+        self,
+        long_cross_price: float,
+        short_cross_price: float
+    ) -> list[StopOrder]:
+        """
+        Pop stop orders triggered by cross price from heaps.
+
+        Triggered orders are sorted by stop order count, which is the same as
+        sending sequence.
+        """
+        triggered: list[tuple[int, StopOrder]] = []
+
+        long_heap: list[tuple[float, int, str]] = self.long_stop_heap
+        while long_heap and long_heap[0][0] <= long_cross_price:
+            __, count, stop_orderid = heappop(long_heap)
+
+            stop_order: StopOrder | None = self.active_stop_orders.get(stop_orderid, None)
+            if stop_order:
+                triggered.append((count, stop_order))
+
+        short_heap: list[tuple[float, int, str]] = self.short_stop_heap
+        while short_heap and -short_heap[0][0] >= short_cross_price:
+            __, count, stop_orderid = heappop(short_heap)
+
+            stop_order = self.active_stop_orders.get(stop_orderid, None)
+            if stop_order:
+                triggered.append((count, stop_order))
+
+        triggered.sort(key=lambda x: x[0])
+        return [x[1] for x in triggered]
+
+    def compact_stop_heaps(self) -> None:
+        """
+        Rebuild stop order heaps when too many cancelled entries left.
+        """
+        total: int = len(self.long_stop_heap) + len(self.short_stop_heap)
+        if total <= len(self.active_stop_orders) * 2 + 64:
+            return
+
+        active: dict[str, StopOrder] = self.active_stop_orders
+        self.long_stop_heap = [x for x in self.long_stop_heap if x[2] in active]
+        self.short_stop_heap = [x for x in self.short_stop_heap if x[2] in active]
+
+        heapify(self.long_stop_heap)
+        heapify(self.short_stop_heap)
+
     def load_bar(
         self,
         vt_symbol: str,
@@ -843,8 +2215,17 @@ class BacktestingEngine:
         init_end = self.start - INTERVAL_DELTA_MAP[interval]
         init_start = self.start - timedelta(days=days)
 
+        superset_data: list | None = self.load_superset_data(vt_symbol, interval, init_start, init_end)
+        if superset_data is not None:
+            return superset_data
+
         symbol, exchange = extract_vt_symbol(vt_symbol)
 
+        if self.history_cache:
+            return self.history_cache.load_bar_data(
+                symbol, exchange, interval, init_start, init_end
+            ).to_list()
+
         bars: list[BarData] = load_bar_data(
             symbol,
             exchange,
@@ -862,8 +2243,17 @@ class BacktestingEngine:
         init_end = self.start - timedelta(seconds=1)
         init_start = self.start - timedelta(days=days)
 
+        superset_data: list | None = self.load_superset_data(vt_symbol, None, init_start, init_end)
+        if superset_data is not None:
+            return superset_data
+
         symbol, exchange = extract_vt_symbol(vt_symbol)
 
+        if self.history_cache:
+            return self.history_cache.load_tick_data(
+                symbol, exchange, init_start, init_end
+            ).to_list()
+
         ticks: list[TickData] = load_tick_data(
             symbol,
             exchange,
@@ -916,6 +2306,13 @@ class BacktestingEngine:
         self.active_stop_orders[stop_order.stop_orderid] = stop_order
         self.stop_orders[stop_order.stop_orderid] = stop_order
 
+        if direction == Direction.LONG:
+            heappush(self.long_stop_heap, (price, self.stop_order_count, stop_order.stop_orderid))
+        elif direction == Direction.SHORT:
+            heappush(self.short_stop_heap, (-price, self.stop_order_count, stop_order.stop_orderid))
+
+        self.compact_stop_heaps()
+
         return stop_order.stop_orderid
 
     def send_limit_order(
@@ -943,6 +2340,13 @@ class BacktestingEngine:
 
         self.active_limit_orders[order.vt_orderid] = order
         self.limit_orders[order.vt_orderid] = order
+        self.submitting_limit_orders[order.vt_orderid] = order
+
+        key: tuple[float, int, str] = (price, self.limit_order_count, order.vt_orderid)
+        if direction == Direction.LONG:
+            insort(self.long_limit_book, key)
+        elif direction == Direction.SHORT:
+            insort(self.short_limit_book, key)
 
         return order.vt_orderid
 
@@ -969,6 +2373,7 @@ class BacktestingEngine:
         if vt_orderid not in self.active_limit_orders:
             return
         order: OrderData = self.active_limit_orders.pop(vt_orderid)
+        self.remove_limit_book(order)
 
         order.status = Status.CANCELLED
         self.strategy.on_order(order)
@@ -1167,11 +2572,146 @@ def evaluate(
     capital: int,
     end: datetime,
     mode: BacktestingMode,
-    setting: dict
+    setting: dict,
+    history: SharedHistory | None = None,
+    history_cache: HistoryCache | None = None,
+    evaluation_cache: EvaluationCache | None = None,
+    evaluation_prefix: str = "",
+    abort_setting: AbortSetting | None = None
 ) -> tuple:
     """
     Function for running in multiprocessing.pool
     """
+    if evaluation_cache:
+        key: str = hash_setting(evaluation_prefix, setting)
+
+        cached: tuple | None = evaluation_cache.get(key)
+        if cached:
+            return cached
+
+    data_key: str = repr((
+        vt_symbol, interval, start, rate, slippage, size, pricetick,
+        capital, end, mode, history, abort_setting
+    ))
+    warmup_key: tuple[str, str] | None = get_warmup_key(strategy_class, data_key, setting)
+
+    snapshot: BacktestingEngine | None = None
+    if warmup_key:
+        snapshot = warmup_snapshots.get(warmup_key, None)
+
+    if snapshot:
+        engine: BacktestingEngine = snapshot.clone_snapshot(setting)
+    else:
+        engine = BacktestingEngine()
+
+        engine.set_parameters(
+            vt_symbol=vt_symbol,
+            interval=interval,
+            start=start,
+            rate=rate,
+            slippage=slippage,
+            size=size,
+            pricetick=pricetick,
+            capital=capital,
+            end=end,
+            mode=mode
+        )
+
+        engine.set_history_cache(history_cache)
+        engine.set_abort_setting(abort_setting)
+        engine.add_strategy(strategy_class, setting)
+
+        if history:
+            engine.use_shared_history(history)
+        else:
+            engine.history_data = find_snapshot_history(data_key)
+            if not engine.history_data:
+                engine.load_data()
+
+        if warmup_key:
+            engine.init_strategy()
+            save_warmup_snapshot(warmup_key, engine.create_snapshot())
+
+    engine.run_backtesting()
+    engine.calculate_result()
+    statistics: dict = engine.calculate_lean_statistics(target_name)
+
+    if engine.aborted:
+        statistics["aborted"] = True
+        target_value: float = ABORT_TARGET_VALUE
+    else:
+        target_value = statistics.get(target_name, 0)
+
+    result: tuple = (setting, target_value, statistics)
+
+    if evaluation_cache:
+        evaluation_cache.put(key, result)
+
+    return result
+
+
+# Warm-up snapshots created in current process: (data_key, warmup_key) -> engine
+warmup_snapshots: dict[tuple[str, str], BacktestingEngine] = {}
+
+
+def get_warmup_key(
+    strategy_class: type[CtaTemplate],
+    data_key: str,
+    setting: dict
+) -> tuple[str, str] | None:
+    """
+    Get key of warm-up snapshot, or None if warm-up parameters not declared.
+    """
+    if strategy_class.warmup_parameters is None:
+        return None
+
+    warmup_setting: dict = {
+        name: setting.get(name, None) for name in strategy_class.warmup_parameters
+    }
+    strategy_key: str = f"{strategy_class.__module__}.{strategy_class.__qualname__}"
+
+    return (data_key, repr((strategy_key, sorted(warmup_setting.items()))))
+
+
+def save_warmup_snapshot(warmup_key: tuple[str, str], snapshot: BacktestingEngine) -> None:
+    """
+    Save warm-up snapshot in current process, removing the oldest if full.
+    """
+    if len(warmup_snapshots) >= WARMUP_SNAPSHOT_SIZE:
+        warmup_snapshots.pop(next(iter(warmup_snapshots)))
+
+    warmup_snapshots[warmup_key] = snapshot
+
+
+def find_snapshot_history(data_key: str) -> list | ColumnarData:
+    """
+    Get history data already loaded by snapshot of the same backtesting data.
+    """
+    for (key, __), snapshot in warmup_snapshots.items():
+        if key == data_key:
+            return snapshot.history_data
+    return []
+
+
+def run_daily_backtesting(
+    strategy_class: type[CtaTemplate],
+    vt_symbol: str,
+    interval: Interval,
+    start: datetime,
+    rate: float,
+    slippage: float,
+    size: float,
+    pricetick: float,
+    capital: int,
+    end: datetime,
+    mode: BacktestingMode,
+    setting: dict,
+    history: SharedHistory | None = None,
+    history_cache: HistoryCache | None = None
+) -> DataFrame:
+    """
+    Function for running backtesting in process pool and returning daily result.
+    """
     engine: BacktestingEngine = BacktestingEngine()
 
     engine.set_parameters(
@@ -1187,38 +2727,493 @@ def evaluate(
         mode=mode
     )
 
+    engine.set_history_cache(history_cache)
     engine.add_strategy(strategy_class, setting)
-    engine.load_data()
+
+    if history:
+        engine.use_shared_history(history)
+    else:
+        engine.load_data()
+
     engine.run_backtesting()
-    engine.calculate_result()
-    statistics: dict = engine.calculate_statistics(output=False)
+    return engine.calculate_result()
 
-    target_value: float = statistics.get(target_name, 0)
-    return (setting, target_value, statistics)
 
+def evaluate_batch(
+    target_name: str,
+    strategy_class: type[CtaTemplate],
+    vt_symbol: str,
+    interval: Interval,
+    start: datetime,
+    rate: float,
+    slippage: float,
+    size: float,
+    pricetick: float,
+    capital: int,
+    end: datetime,
+    mode: BacktestingMode,
+    settings: list[dict],
+    history: SharedHistory | None = None,
+    history_cache: HistoryCache | None = None,
+    evaluation_cache: EvaluationCache | None = None,
+    evaluation_prefix: str = "",
+    abort_setting: AbortSetting | None = None
+) -> list[tuple]:
+    """
+    Function for evaluating a batch of settings in one data pass.
+    """
+    results: dict[int, tuple] = {}
+    keys: dict[int, str] = {}
+
+    if evaluation_cache:
+        for i, setting in enumerate(settings):
+            keys[i] = hash_setting(evaluation_prefix, setting)
+
+            cached: tuple | None = evaluation_cache.get(keys[i])
+            if cached:
+                results[i] = cached
+
+    # Only replay settings not found in evaluation cache
+    indexes: list[int] = [i for i in range(len(settings)) if i not in results]
+    if not indexes:
+        return [results[i] for i in range(len(settings))]
+
+    engine: BacktestingEngine = BacktestingEngine()
+
+    engine.set_parameters(
+        vt_symbol=vt_symbol,
+        interval=interval,
+        start=start,
+        rate=rate,
+        slippage=slippage,
+        size=size,
+        pricetick=pricetick,
+        capital=capital,
+        end=end,
+        mode=mode
+    )
 
-def wrap_evaluate(engine: BacktestingEngine, target_name: str) -> Callable:
+    engine.set_history_cache(history_cache)
+    engine.set_abort_setting(abort_setting)
+    engine.strategy_class = strategy_class
+
+    if history:
+        engine.use_shared_history(history)
+    else:
+        engine.load_data()
+
+    children: list[BacktestingEngine] = engine.run_batch_backtesting([settings[i] for i in indexes])
+
+    for i, child in zip(indexes, children, strict=True):
+        child.calculate_result()
+        statistics: dict = child.calculate_lean_statistics(target_name)
+
+        if child.aborted:
+            statistics["aborted"] = True
+            target_value: float = ABORT_TARGET_VALUE
+        else:
+            target_value = statistics.get(target_name, 0)
+
+        results[i] = (settings[i], target_value, statistics)
+
+        if evaluation_cache:
+            evaluation_cache.put(keys[i], results[i])
+
+    return [results[i] for i in range(len(settings))]
+
+
+def wrap_evaluate(
+    engine: BacktestingEngine,
+    target_name: str,
+    history: SharedHistory | None = None,
+    batch: bool = False,
+    abort_setting: AbortSetting | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None
+) -> Callable:
     """
     Wrap evaluate function with given setting from backtesting engine.
+
+    The wrapped function takes a list of settings instead if batch is True,
+    and backtesting runs within start/end instead of engine period if given.
     """
+    if not start:
+        start = engine.start
+
+    if not end:
+        end = engine.end
+
+    if batch:
+        evaluate_func: Callable = evaluate_batch
+    else:
+        evaluate_func = evaluate
+
+    # Hash of strategy code and parameters is calculated once in main process
+    evaluation_prefix: str = ""
+    if engine.evaluation_cache:
+        evaluation_prefix = get_evaluation_prefix(engine, target_name, abort_setting, start, end)
+
     func: Callable = partial(
-        evaluate,
+        evaluate_func,
         target_name,
         engine.strategy_class,
         engine.vt_symbol,
         engine.interval,
-        engine.start,
+        start,
         engine.rate,
         engine.slippage,
         engine.size,
         engine.pricetick,
         engine.capital,
-        engine.end,
-        engine.mode
+        end,
+        engine.mode,
+        history=history,
+        history_cache=engine.history_cache,
+        evaluation_cache=engine.evaluation_cache,
+        evaluation_prefix=evaluation_prefix,
+        abort_setting=abort_setting
     )
     return func
 
 
+def get_evaluation_prefix(
+    engine: BacktestingEngine,
+    target_name: str,
+    abort_setting: AbortSetting | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None
+) -> str:
+    """
+    Get hash of strategy code and backtesting parameters of evaluation.
+    """
+    prefix: str = hash_evaluation(engine.strategy_class, {
+        "target_name": target_name,
+        "vt_symbol": engine.vt_symbol,
+        "interval": engine.interval,
+        "start": start or engine.start,
+        "end": end or engine.end,
+        "rate": engine.rate,
+        "slippage": engine.slippage,
+        "size": engine.size,
+        "pricetick": engine.pricetick,
+        "capital": engine.capital,
+        "mode": engine.mode,
+        "abort_setting": abort_setting,
+    })
+    return prefix
+
+
+def run_batch_optimization(
+    evaluate_func: Callable,
+    optimization_setting: OptimizationSetting,
+    key_func: Callable,
+    batch_size: int,
+    max_workers: int | None = None,
+    output: Callable = print
+) -> list[tuple]:
+    """
+    Run brute force optimization with settings evaluated batch by batch.
+    """
+    settings: list[dict] = optimization_setting.generate_settings()
+    batches: list[list[dict]] = [
+        settings[i: i + batch_size] for i in range(0, len(settings), batch_size)
+    ]
+
+    output(_("开始执行穷举算法优化"))
+    output(_("参数优化空间：{}").format(len(settings)))
+    output(_("每批回测参数数量：{}").format(batch_size))
+
+    start: float = perf_counter()
+
+    results: list[tuple] = []
+
+    with ProcessPoolExecutor(max_workers, mp_context=get_context("spawn")) as executor:
+        for batch_results in tqdm(executor.map(evaluate_func, batches), total=len(batches)):
+            results.extend(batch_results)
+
+    results.sort(reverse=True, key=key_func)
+
+    cost: int = int(perf_counter() - start)
+    output(_("穷举算法优化完成，耗时{}秒").format(cost))
+
+    return results
+
+
+def calculate_statistics_array(
+    net_pnl: np.ndarray,
+    capital: float,
+    risk_free: float = 0,
+    annual_days: int = 240,
+    half_life: int = 120,
+    dates: list | None = None,
+    commission: np.ndarray | None = None,
+    slippage: np.ndarray | None = None,
+    turnover: np.ndarray | None = None,
+    trade_count: np.ndarray | None = None,
+    target_name: str = ""
+) -> dict:
+    """
+    Calculate statistics from daily net pnl array without pandas.
+
+    Results are the same as BacktestingEngine.calculate_statistics. When
+    target_name is given, ewm_sharpe and rgr_ratio are only calculated if
+    they are the target, otherwise they are returned as nan.
+    """
+    net_pnl = np.asarray(net_pnl, dtype=np.float64)
+    total_days: int = len(net_pnl)
+
+    calc_ewm: bool = not target_name or target_name == "ewm_sharpe"
+    calc_rgr: bool = not target_name or target_name == "rgr_ratio"
+
+    statistics: dict = {
+        "start_date": "",
+        "end_date": "",
+        "total_days": 0,
+        "profit_days": 0,
+        "loss_days": 0,
+        "capital": capital,
+        "end_balance": 0,
+        "max_drawdown": 0,
+        "max_ddpercent": 0,
+        "max_drawdown_duration": 0,
+        "total_net_pnl": 0,
+        "daily_net_pnl": 0,
+        "total_commission": 0,
+        "daily_commission": 0,
+        "total_slippage": 0,
+        "daily_slippage": 0,
+        "total_turnover": 0,
+        "daily_turnover": 0,
+        "total_trade_count": 0,
+        "daily_trade_count": 0,
+        "total_return": 0,
+        "annual_return": 0,
+        "daily_return": 0,
+        "return_std": 0,
+        "sharpe_ratio": 0,
+        "ewm_sharpe": 0,
+        "return_drawdown_ratio": 0,
+        "rgr_ratio": 0,
+    }
+
+    if not total_days:
+        return statistics
+
+    # Calculate balance and log return, with non-positive ratio set to 0 return
+    balance: np.ndarray = np.cumsum(net_pnl) + capital
+
+    # All balance value needs to be positive
+    if not (balance > 0).all():
+        return statistics
+
+    pre_balance: np.ndarray = np.empty(total_days)
+    pre_balance[0] = capital
+    pre_balance[1:] = balance[:-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x: np.ndarray = balance / pre_balance
+        x[x <= 0] = np.nan
+        returns: np.ndarray = np.nan_to_num(np.log(x), nan=0, posinf=np.inf, neginf=-np.inf)
+
+    # Drawdown from cumulative max of balance
+    highlevel: np.ndarray = np.maximum.accumulate(balance)
+    drawdown: np.ndarray = balance - highlevel
+    ddpercent: np.ndarray = drawdown / highlevel * 100
+
+    max_drawdown: float = drawdown.min()
+    max_ddpercent: float = ddpercent.min()
+
+    max_drawdown_duration: int = 0
+    if dates:
+        statistics["start_date"] = dates[0]
+        statistics["end_date"] = dates[-1]
+
+        end_ix: int = int(drawdown.argmin())
+        start_ix: int = int(balance[:end_ix + 1].argmax())
+
+        max_drawdown_end = dates[end_ix]
+        if isinstance(max_drawdown_end, Date):
+            max_drawdown_duration = (max_drawdown_end - dates[start_ix]).days
+
+    end_balance: float = balance[-1]
+    total_net_pnl: float = net_pnl.sum()
+
+    total_commission: float = 0
+    if commission is not None:
+        total_commission = commission.sum()
+
+    total_slippage: float = 0
+    if slippage is not None:
+        total_slippage = slippage.sum()
+
+    total_turnover: float = 0
+    if turnover is not None:
+        total_turnover = turnover.sum()
+
+    total_trade_count: int = 0
+    if trade_count is not None:
+        total_trade_count = trade_count.sum()
+
+    total_return: float = (end_balance / capital - 1) * 100
+    annual_return: float = total_return / total_days * annual_days
+    daily_return: float = returns.mean() * 100
+
+    if total_days > 1:
+        return_std: float = returns.std(ddof=1) * 100
+    else:
+        return_std = np.nan
+
+    sharpe_ratio: float = 0
+    ewm_sharpe: float = 0
+
+    if return_std:
+        daily_risk_free: float = risk_free / np.sqrt(annual_days)
+        sharpe_ratio = (daily_return - daily_risk_free) / return_std * np.sqrt(annual_days)
+
+        if calc_ewm:
+            ewm_mean, ewm_std = calc_ewm_last(returns, half_life)
+            ewm_sharpe = (ewm_mean * 100 - daily_risk_free) / (ewm_std * 100) * np.sqrt(annual_days)
+
+    if max_ddpercent:
+        return_drawdown_ratio: float = -total_return / max_ddpercent
+    else:
+        return_drawdown_ratio = 0
+
+    statistics.update({
+        "total_days": total_days,
+        "profit_days": int((net_pnl > 0).sum()),
+        "loss_days": int((net_pnl < 0).sum()),
+        "end_balance": end_balance,
+        "max_drawdown": max_drawdown,
+        "max_ddpercent": max_ddpercent,
+        "max_drawdown_duration": max_drawdown_duration,
+        "total_net_pnl": total_net_pnl,
+        "daily_net_pnl": total_net_pnl / total_days,
+        "total_commission": total_commission,
+        "daily_commission": total_commission / total_days,
+        "total_slippage": total_slippage,
+        "daily_slippage": total_slippage / total_days,
+        "total_turnover": total_turnover,
+        "daily_turnover": total_turnover / total_days,
+        "total_trade_count": total_trade_count,
+        "daily_trade_count": total_trade_count / total_days,
+        "total_return": total_return,
+        "annual_return": annual_return,
+        "daily_return": daily_return,
+        "return_std": return_std,
+        "sharpe_ratio": sharpe_ratio,
+        "return_drawdown_ratio": return_drawdown_ratio,
+    })
+
+    if calc_ewm:
+        statistics["ewm_sharpe"] = ewm_sharpe
+
+    if calc_rgr:
+        if return_std > 0:
+            stability_return: float = 1 / (1 + return_std / 100)
+        else:
+            stability_return = 0
+
+        downside_diff: np.ndarray = np.minimum(returns, 0.0)
+        downside_std: float = np.sqrt(np.mean(downside_diff ** 2))
+
+        sorted_returns: np.ndarray = np.sort(returns)
+        cutoff_index: int = int(np.ceil(total_days * 0.05))
+
+        return_skew, return_kurt = calc_skew_kurt(returns)
+
+        statistics["rgr_ratio"] = calc_rgr_ratio(
+            annual_return / 100,
+            stability_return,
+            downside_std * np.sqrt(252),
+            max_ddpercent,
+            return_skew,
+            return_kurt,
+            np.mean(sorted_returns[:cutoff_index])
+        )
+
+    # Filter potential error infinite value
+    for key, value in statistics.items():
+        if value in (np.inf, -np.inf):
+            value = 0
+        statistics[key] = np.nan_to_num(value)
+
+    # Metrics skipped are nan, so as not to be mistaken for real zero
+    if not calc_ewm:
+        statistics["ewm_sharpe"] = np.nan
+
+    if not calc_rgr:
+        statistics["rgr_ratio"] = np.nan
+
+    return statistics
+
+
+def calc_ewm_last(values: np.ndarray, half_life: float) -> tuple[float, float]:
+    """
+    Calculate last value of exponential weighted mean and std (bias corrected),
+    same as pandas ewm(halflife=half_life) with default adjust=True.
+    """
+    n: int = len(values)
+    if n < 2:
+        return np.nan, np.nan
+
+    alpha: float = 1 - np.exp(-np.log(2) / half_life)
+    weights: np.ndarray = (1 - alpha) ** np.arange(n - 1, -1, -1)
+
+    sum_weight: float = weights.sum()
+    mean: float = (weights * values).sum() / sum_weight
+    var: float = (weights * (values - mean) ** 2).sum() / sum_weight
+
+    sum_weight2: float = (weights ** 2).sum()
+    var *= sum_weight ** 2 / (sum_weight ** 2 - sum_weight2)
+
+    return mean, np.sqrt(var)
+
+
+def calc_skew_kurt(values: np.ndarray) -> tuple[float, float]:
+    """
+    Calculate unbiased skewness and excess kurtosis, same as pandas Series.
+    """
+    n: int = len(values)
+
+    adjusted: np.ndarray = values - values.sum() / n
+    adjusted2: np.ndarray = adjusted ** 2
+
+    m2: float = adjusted2.sum()
+    m3: float = zero_out_fperr((adjusted2 * adjusted).sum())
+    m4: float = (adjusted2 ** 2).sum()
+
+    if n < 3:
+        skew: float = np.nan
+    elif zero_out_fperr(m2) == 0:
+        skew = 0
+    else:
+        skew = (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / zero_out_fperr(m2) ** 1.5)
+
+    if n < 4:
+        kurt: float = np.nan
+    else:
+        numerator: float = zero_out_fperr(n * (n + 1) * (n - 1) * m4)
+        denominator: float = zero_out_fperr((n - 2) * (n - 3) * m2 ** 2)
+
+        if denominator == 0:
+            kurt = 0
+        else:
+            adj: float = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            kurt = numerator / denominator - adj
+
+    return skew, kurt
+
+
+def zero_out_fperr(value: float) -> float:
+    """
+    Treat tiny floating point error as zero.
+    """
+    if abs(value) < 1e-14:
+        return 0
+    return value
+
+
 def calc_rgr_ratio(
     cagr_value: float,
     stability_return: float,
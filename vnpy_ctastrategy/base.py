@@ -45,6 +45,16 @@ class StopOrder:
     status: StopOrderStatus = StopOrderStatus.WAITING
 
 
+@dataclass
+class AbortSetting:
+    """
+    Criteria for aborting backtesting early, 0 means not checked.
+    """
+    max_ddpercent: float = 0            # max drawdown percent, positive value like 30
+    min_balance: float = 0              # min mark-to-market balance
+    max_trade_count: int = 0            # max number of trades
+
+
 EVENT_CTA_LOG = "eCtaLog"
 EVENT_CTA_STRATEGY = "eCtaStrategy"
 EVENT_CTA_STOPORDER = "eCtaStopOrder"
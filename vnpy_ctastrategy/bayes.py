@@ -0,0 +1,145 @@
+"""
+Gaussian process surrogate model used by Bayesian optimization.
+"""
+
+import math
+
+import numpy as np
+
+
+# Candidate length scales of RBF kernel on inputs normalized into [0, 1]
+LENGTH_SCALES: tuple[float, ...] = (0.05, 0.1, 0.2, 0.4, 0.8)
+
+normal_cdf = np.vectorize(lambda x: 0.5 * (1 + math.erf(x / math.sqrt(2))), otypes=[float])
+
+
+class GaussianProcess:
+    """
+    Gaussian process regression with RBF kernel.
+
+    Target values are standardized before fitting, and kernel length scale is
+    chosen from LENGTH_SCALES by log marginal likelihood.
+    """
+
+    def __init__(self, noise: float = 1e-3) -> None:
+        """"""
+        self.noise: float = noise
+        self.length_scale: float = LENGTH_SCALES[0]
+
+        self.x: np.ndarray = np.empty((0, 0))
+        self.y_mean: float = 0
+        self.y_std: float = 1
+
+        self.chol: np.ndarray = np.empty((0, 0))
+        self.alpha: np.ndarray = np.empty(0)
+
+    def fit(self, x: np.ndarray, y: np.ndarray, length_scale: float = 0) -> None:
+        """
+        Fit model, selecting length scale if not given.
+        """
+        self.x = x
+        self.y_mean = float(y.mean())
+        self.y_std = float(y.std()) or 1
+
+        z: np.ndarray = (y - self.y_mean) / self.y_std
+
+        if length_scale:
+            length_scales: tuple[float, ...] = (length_scale,)
+        else:
+            length_scales = LENGTH_SCALES
+
+        best_lml: float = -np.inf
+
+        for ls in length_scales:
+            k: np.ndarray = rbf_kernel(x, x, ls) + np.eye(len(x)) * self.noise
+
+            try:
+                chol: np.ndarray = np.linalg.cholesky(k)
+            except np.linalg.LinAlgError:
+                continue
+
+            alpha: np.ndarray = np.linalg.solve(chol.T, np.linalg.solve(chol, z))
+            lml: float = -0.5 * float(z @ alpha) - float(np.log(np.diag(chol)).sum())
+
+            if lml > best_lml:
+                best_lml = lml
+                self.length_scale = ls
+                self.chol = chol
+                self.alpha = alpha
+
+    def predict(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predict mean and standard deviation.
+        """
+        k: np.ndarray = rbf_kernel(x, self.x, self.length_scale)
+
+        mean: np.ndarray = k @ self.alpha
+        v: np.ndarray = np.linalg.solve(self.chol, k.T)
+        var: np.ndarray = np.maximum(1 - (v ** 2).sum(axis=0), 1e-12)
+
+        return mean * self.y_std + self.y_mean, np.sqrt(var) * self.y_std
+
+
+def rbf_kernel(a: np.ndarray, b: np.ndarray, length_scale: float) -> np.ndarray:
+    """
+    Calculate RBF kernel matrix between two sets of points.
+    """
+    sqdist: np.ndarray = (
+        (a ** 2).sum(axis=1)[:, None]
+        + (b ** 2).sum(axis=1)[None, :]
+        - 2 * a @ b.T
+    )
+    kernel: np.ndarray = np.exp(-0.5 * np.maximum(sqdist, 0) / length_scale ** 2)
+    return kernel
+
+
+def expected_improvement(
+    mean: np.ndarray,
+    std: np.ndarray,
+    best: float,
+    xi: float = 0.01
+) -> np.ndarray:
+    """
+    Calculate expected improvement over best value for maximization.
+    """
+    improvement: np.ndarray = mean - best - xi
+    z: np.ndarray = improvement / std
+
+    pdf: np.ndarray = np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+    cdf: np.ndarray = normal_cdf(z)
+
+    ei: np.ndarray = improvement * cdf + std * pdf
+    return ei
+
+
+def propose_batch(
+    x: np.ndarray,
+    y: np.ndarray,
+    candidates: np.ndarray,
+    batch_size: int
+) -> list[int]:
+    """
+    Propose indexes of candidates to be evaluated in parallel.
+
+    Constant liar strategy is used: each proposed point is added to observations
+    with mean of observed values, then the model is fitted again for the next.
+    """
+    gp: GaussianProcess = GaussianProcess()
+    gp.fit(x, y)
+
+    liar: float = float(y.mean())
+    chosen: list[int] = []
+
+    for __ in range(min(batch_size, len(candidates))):
+        mean, std = gp.predict(candidates)
+        ei: np.ndarray = expected_improvement(mean, std, float(y.max()))
+        ei[chosen] = -np.inf
+
+        ix: int = int(np.argmax(ei))
+        chosen.append(ix)
+
+        x = np.vstack([x, candidates[ix]])
+        y = np.append(y, liar)
+        gp.fit(x, y, gp.length_scale)
+
+    return chosen
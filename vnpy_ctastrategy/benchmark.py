@@ -0,0 +1,420 @@
+"""
+Benchmark of backtesting replay and optimization with synthetic data.
+
+Run with "python -m vnpy_ctastrategy.benchmark", and the result is reported
+in JSON format for tracking performance regression. No database is needed,
+since deterministic bar and tick data are generated from random seed.
+"""
+
+import argparse
+import json
+import platform
+import tracemalloc
+from datetime import date, datetime, timedelta
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.optimize import OptimizationSetting
+
+from . import __version__
+from .backtesting import BacktestingEngine, BacktestingMode
+from .cache import slice_data
+from .history import ColumnarData, datetime_to_int
+from .template import CtaTemplate
+from .strategies.atr_rsi_strategy import AtrRsiStrategy
+from .strategies.boll_channel_strategy import BollChannelStrategy
+from .strategies.double_ma_strategy import DoubleMaStrategy
+from .strategies.dual_thrust_strategy import DualThrustStrategy
+from .strategies.king_keltner_strategy import KingKeltnerStrategy
+from .strategies.multi_signal_strategy import MultiSignalStrategy
+from .strategies.multi_timeframe_strategy import MultiTimeframeStrategy
+from .strategies.turtle_signal_strategy import TurtleSignalStrategy
+
+
+SYMBOL: str = "BENCH"
+EXCHANGE: Exchange = Exchange.LOCAL
+VT_SYMBOL: str = f"{SYMBOL}.{EXCHANGE.value}"
+
+PRICE: float = 4000
+PRICETICK: float = 0.2
+SIZE: float = 300
+
+# Trading sessions of each weekday in seconds since midnight
+SESSIONS: tuple[tuple[int, int], ...] = ((34200, 41400), (46800, 54000))
+
+# Calendar days of bars generated before backtesting start for load_bar
+WARMUP_DAYS: int = 40
+
+BAR_STRATEGIES: tuple[type[CtaTemplate], ...] = (
+    AtrRsiStrategy,
+    BollChannelStrategy,
+    DoubleMaStrategy,
+    DualThrustStrategy,
+    KingKeltnerStrategy,
+    MultiSignalStrategy,
+    MultiTimeframeStrategy,
+    TurtleSignalStrategy,
+)
+
+TICK_STRATEGIES: tuple[type[CtaTemplate], ...] = (
+    AtrRsiStrategy,
+    DoubleMaStrategy,
+    MultiSignalStrategy,
+)
+
+
+def generate_datetimes(start: date, count: int, step: timedelta) -> np.ndarray:
+    """
+    Generate datetimes as int within trading sessions of weekdays.
+    """
+    step_us: int = step // timedelta(microseconds=1)
+
+    offsets: np.ndarray = np.concatenate([
+        np.arange(begin * 1_000_000, end * 1_000_000, step_us, dtype=np.int64)
+        for begin, end in SESSIONS
+    ])
+
+    days: list[int] = []
+    d: date = start
+
+    while len(days) * len(offsets) < count:
+        if d.weekday() < 5:
+            days.append(datetime_to_int(datetime(d.year, d.month, d.day, tzinfo=DB_TZ)))
+        d += timedelta(days=1)
+
+    datetimes: np.ndarray = (np.array(days, dtype=np.int64)[:, None] + offsets[None, :]).ravel()
+    return datetimes[:count]
+
+
+def generate_prices(rng: np.random.Generator, count: int, volatility: float) -> np.ndarray:
+    """
+    Generate random walk prices rounded to pricetick.
+    """
+    returns: np.ndarray = rng.normal(0, volatility, count)
+    prices: np.ndarray = PRICE * np.exp(np.cumsum(returns))
+    rounded: np.ndarray = np.round(prices / PRICETICK) * PRICETICK
+    return rounded
+
+
+def generate_bar_data(start: date, count: int, seed: int = 0) -> ColumnarData:
+    """
+    Generate deterministic 1 minute bar data.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    close: np.ndarray = generate_prices(rng, count, 0.001)
+    open_: np.ndarray = np.concatenate([[PRICE], close[:-1]])
+
+    spread: np.ndarray = np.round(np.abs(rng.normal(0, 0.0005, count)) * close / PRICETICK) * PRICETICK
+    high: np.ndarray = np.maximum(open_, close) + spread
+    low: np.ndarray = np.minimum(open_, close) - spread
+
+    volume: np.ndarray = rng.integers(1, 1000, count).astype(np.float64)
+    turnover: np.ndarray = volume * close * SIZE
+    open_interest: np.ndarray = 100_000 + np.cumsum(rng.integers(-50, 51, count)).astype(np.float64)
+
+    return ColumnarData(
+        SYMBOL,
+        EXCHANGE,
+        Interval.MINUTE,
+        "DB",
+        tz=DB_TZ,
+        datetimes=generate_datetimes(start, count, timedelta(minutes=1)),
+        values=np.column_stack([volume, turnover, open_interest, open_, high, low, close])
+    )
+
+
+def generate_tick_data(start: date, count: int, seed: int = 0) -> ColumnarData:
+    """
+    Generate deterministic tick data with 5 levels of depth every 500ms.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    last_price: np.ndarray = generate_prices(rng, count, 0.0001)
+    last_volume: np.ndarray = rng.integers(0, 20, count).astype(np.float64)
+    volume: np.ndarray = np.cumsum(last_volume)
+    turnover: np.ndarray = np.cumsum(last_volume * last_price * SIZE)
+    open_interest: np.ndarray = 100_000 + np.cumsum(rng.integers(-2, 3, count)).astype(np.float64)
+
+    constant: np.ndarray = np.full(count, PRICE)
+    columns: list[np.ndarray] = [
+        volume,
+        turnover,
+        open_interest,
+        last_price,
+        last_volume,
+        constant * 1.1,
+        constant * 0.9,
+        constant,
+        np.maximum.accumulate(last_price),
+        np.minimum.accumulate(last_price),
+        constant,
+    ]
+    columns.extend(last_price - PRICETICK * i for i in range(1, 6))
+    columns.extend(last_price + PRICETICK * i for i in range(1, 6))
+    columns.extend(rng.integers(1, 100, count).astype(np.float64) for __ in range(10))
+
+    return ColumnarData(
+        SYMBOL,
+        EXCHANGE,
+        None,
+        "DB",
+        tz=DB_TZ,
+        datetimes=generate_datetimes(start, count, timedelta(milliseconds=500)),
+        values=np.column_stack(columns)
+    )
+
+
+def create_engine(mode: BacktestingMode, start: datetime, end: datetime) -> BacktestingEngine:
+    """
+    Create engine with backtesting parameters of synthetic contract.
+    """
+    engine: BacktestingEngine = BacktestingEngine()
+    engine.output = lambda msg: None      # type: ignore[method-assign]
+
+    engine.set_parameters(
+        vt_symbol=VT_SYMBOL,
+        interval=Interval.MINUTE,
+        start=start,
+        end=end,
+        rate=0.3 / 10000,
+        slippage=PRICETICK,
+        size=SIZE,
+        pricetick=PRICETICK,
+        capital=1_000_000,
+        mode=mode
+    )
+    return engine
+
+
+def run_backtesting_case(
+    strategy_class: type[CtaTemplate],
+    mode: BacktestingMode,
+    data: ColumnarData,
+    bar_data: ColumnarData,
+    columnar: bool = False,
+    measure_memory: bool = True
+) -> dict:
+    """
+    Benchmark replay of one strategy.
+
+    Warm-up data of load_bar is served from bar data which covers period
+    before start, so that no database query is needed.
+    """
+    start: datetime = datetime.fromtimestamp(data.datetimes[0] / 1_000_000, DB_TZ)
+    end: datetime = datetime.fromtimestamp(data.datetimes[-1] / 1_000_000, DB_TZ)
+
+    def run() -> tuple[BacktestingEngine, float]:
+        engine: BacktestingEngine = create_engine(mode, start, end)
+        engine.add_strategy(strategy_class, {})
+
+        engine.history_superset = bar_data
+        if columnar:
+            engine.history_data = data
+        else:
+            engine.history_data = data.to_list()
+
+        begin: float = perf_counter()
+        engine.run_backtesting()
+        cost: float = perf_counter() - begin
+
+        engine.calculate_result()
+        return engine, cost
+
+    engine, cost = run()
+
+    result: dict = {
+        "name": f"{mode.name.lower()}_{strategy_class.__name__}",
+        "strategy": strategy_class.__name__,
+        "mode": mode.name.lower(),
+        "events": len(data),
+        "seconds": cost,
+        "events_per_second": len(data) / cost,
+        "trade_count": len(engine.trades),
+    }
+
+    # Memory is measured in another run, since tracing slows down replay
+    if measure_memory:
+        tracemalloc.start()
+        run()
+        result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    return result
+
+
+def run_optimization_case(bar_data: ColumnarData, start: datetime, max_workers: int | None) -> dict:
+    """
+    Benchmark brute force optimization of DoubleMaStrategy with shared history.
+    """
+    end: datetime = datetime.fromtimestamp(bar_data.datetimes[-1] / 1_000_000, DB_TZ)
+
+    engine: BacktestingEngine = create_engine(BacktestingMode.BAR, start, end)
+    engine.add_strategy(DoubleMaStrategy, {})
+
+    # Whole data including warm-up is published without querying database,
+    # and workers slice it by start
+    engine.history_data = bar_data
+
+    setting: OptimizationSetting = OptimizationSetting()
+    setting.set_target("sharpe_ratio")
+    setting.add_parameter("fast_window", 5, 20, 5)
+    setting.add_parameter("slow_window", 30, 60, 10)
+
+    count: int = len(setting.generate_settings())
+
+    begin: float = perf_counter()
+    engine.run_bf_optimization(
+        setting,
+        output=False,
+        max_workers=max_workers,
+        share_history=True,
+        warmup_days=0
+    )
+    cost: float = perf_counter() - begin
+
+    return {
+        "name": "optimization_DoubleMaStrategy",
+        "strategy": DoubleMaStrategy.__name__,
+        "mode": BacktestingMode.BAR.name.lower(),
+        "evaluations": count,
+        "events": len(slice_data(bar_data, datetime_to_int(start), datetime_to_int(end))) * count,
+        "seconds": cost,
+        "evaluations_per_second": count / cost,
+    }
+
+
+def run_benchmark(
+    bar_count: int = 100_000,
+    tick_count: int = 100_000,
+    seed: int = 0,
+    strategies: list[str] | None = None,
+    columnar: bool = False,
+    measure_memory: bool = True,
+    optimization: bool = True,
+    max_workers: int | None = None
+) -> dict:
+    """
+    Run all benchmark cases and return the report.
+    """
+    warmup_start: date = date(2020, 1, 1)
+    start: date = warmup_start + timedelta(days=WARMUP_DAYS)
+
+    weekdays: int = sum((warmup_start + timedelta(days=i)).weekday() < 5 for i in range(WARMUP_DAYS))
+    warmup_count: int = weekdays * sum((end - begin) // 60 for begin, end in SESSIONS)
+
+    # Bars of warm-up period and replay period are generated as one series
+    bar_data: ColumnarData = generate_bar_data(warmup_start, warmup_count + bar_count, seed)
+    tick_data: ColumnarData = generate_tick_data(start, tick_count, seed)
+
+    cases: list[dict] = []
+
+    for strategy_class in BAR_STRATEGIES:
+        if strategies and strategy_class.__name__ not in strategies:
+            continue
+
+        cases.append(run_backtesting_case(
+            strategy_class,
+            BacktestingMode.BAR,
+            bar_data[warmup_count:],
+            bar_data,
+            columnar,
+            measure_memory
+        ))
+
+    for strategy_class in TICK_STRATEGIES:
+        if strategies and strategy_class.__name__ not in strategies:
+            continue
+
+        cases.append(run_backtesting_case(
+            strategy_class,
+            BacktestingMode.TICK,
+            tick_data,
+            bar_data,
+            columnar,
+            measure_memory
+        ))
+
+    if optimization:
+        start_dt: datetime = datetime(start.year, start.month, start.day, tzinfo=DB_TZ)
+        cases.append(run_optimization_case(bar_data, start_dt, max_workers))
+
+    replay_cases: list[dict] = [c for c in cases if "evaluations" not in c]
+    bar_cases: list[dict] = [c for c in replay_cases if c["mode"] == BacktestingMode.BAR.name.lower()]
+    tick_cases: list[dict] = [c for c in replay_cases if c["mode"] == BacktestingMode.TICK.name.lower()]
+
+    summary: dict[str, Any] = {}
+    if bar_cases:
+        summary["bars_per_second"] = sum(c["events"] for c in bar_cases) / sum(c["seconds"] for c in bar_cases)
+    if tick_cases:
+        summary["ticks_per_second"] = sum(c["events"] for c in tick_cases) / sum(c["seconds"] for c in tick_cases)
+    if optimization:
+        summary["evaluations_per_second"] = cases[-1]["evaluations_per_second"]
+    if measure_memory:
+        summary["peak_memory_mb"] = max((c.get("peak_memory_mb", 0) for c in cases), default=0)
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "created": datetime.now().isoformat(),
+        "parameters": {
+            "bar_count": bar_count,
+            "tick_count": tick_count,
+            "seed": seed,
+            "columnar": columnar,
+        },
+        "summary": summary,
+        "cases": cases,
+    }
+
+
+def main() -> None:
+    """
+    Command line entry point of benchmark.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Benchmark CTA backtesting with synthetic data."
+    )
+    parser.add_argument("--bars", type=int, default=100_000, help="number of bars replayed by each strategy")
+    parser.add_argument("--ticks", type=int, default=100_000, help="number of ticks replayed by each strategy")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of synthetic data")
+    parser.add_argument("--strategy", action="append", default=[], help="only run given strategy class")
+    parser.add_argument("--columnar", action="store_true", help="replay columnar data instead of list")
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory measurement")
+    parser.add_argument("--no-optimization", action="store_true", help="skip optimization benchmark")
+    parser.add_argument("--workers", type=int, default=None, help="max workers of optimization")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="",
+        help="path of JSON report, printed to stdout if not given"
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    report: dict = run_benchmark(
+        bar_count=args.bars,
+        tick_count=args.ticks,
+        seed=args.seed,
+        strategies=args.strategy,
+        columnar=args.columnar,
+        measure_memory=not args.no_memory,
+        optimization=not args.no_optimization,
+        max_workers=args.workers
+    )
+
+    content: str = json.dumps(report, indent=4)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    main()
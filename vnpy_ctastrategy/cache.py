@@ -0,0 +1,948 @@
+"""
+Cache of history data and optimization results.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import sys
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from copy import copy
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, tzinfo
+from functools import partial
+from pathlib import Path
+from threading import Lock
+from time import time
+from types import TracebackType
+from typing import Any, TextIO
+from uuid import uuid4
+
+import numpy as np
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import BaseDatabase, get_database, DB_TZ
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import get_folder_path, get_file_path
+
+from .history import ColumnarData, datetime_to_int, int_to_datetime
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+FETCH_FUNC = Callable[[datetime, datetime], list[BarData] | list[TickData]]
+
+
+class HistoryCache:
+    """
+    Range indexed history data cache stored in local folder.
+
+    Data of each symbol/interval is saved as segments of .npy files, and every
+    segment records the continuous time range it covers (including periods
+    without any data). Requests are served from memory mapped segments, and
+    only the missing gaps are fetched from database.
+
+    The folder can be shared by worker processes. Every read-modify-write of
+    index files is done with file lock of the symbol/interval folder held,
+    while gaps are fetched without any lock.
+    """
+
+    index_filename: str = "index.json"
+    lock_filename: str = "cache.lock"
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_bytes: int = 4 * 1024 ** 3
+    ) -> None:
+        """"""
+        if path:
+            self.path: Path = Path(path)
+            self.path.mkdir(parents=True, exist_ok=True)
+        else:
+            self.path = get_folder_path("cta_history_cache")
+
+        self.max_bytes: int = max_bytes
+
+        self.lock: Lock = Lock()
+        self.reset_statistics()
+
+    def __getstate__(self) -> dict:
+        """
+        Only path and limit are pickled when passed to other processes.
+        """
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        """"""
+        self.path = state["path"]
+        self.max_bytes = state["max_bytes"]
+
+        self.lock = Lock()
+        self.reset_statistics()
+
+    def reset_statistics(self) -> None:
+        """
+        Reset hit/miss statistics of cache.
+        """
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        self.fetch_count: int = 0
+        self.fetch_size: int = 0
+        self.evict_count: int = 0
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        fetch: FETCH_FUNC | None = None,
+        cover_empty: bool = True
+    ) -> ColumnarData:
+        """
+        Load bar data within [start, end], default fetching gaps from database.
+        """
+        if not fetch:
+            database: BaseDatabase = get_database()
+            fetch = partial(database.load_bar_data, symbol, exchange, interval)
+
+        template: ColumnarData = ColumnarData(symbol, exchange, interval, tz=DB_TZ)
+        return self.load_data(template, start, end, fetch, cover_empty)
+
+    def load_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        fetch: FETCH_FUNC | None = None
+    ) -> ColumnarData:
+        """
+        Load tick data within [start, end], default fetching gaps from database.
+        """
+        if not fetch:
+            database: BaseDatabase = get_database()
+            fetch = partial(database.load_tick_data, symbol, exchange)
+
+        template: ColumnarData = ColumnarData(symbol, exchange, None, tz=DB_TZ)
+        return self.load_data(template, start, end, fetch)
+
+    def load_data(
+        self,
+        template: ColumnarData,
+        start: datetime,
+        end: datetime,
+        fetch: FETCH_FUNC,
+        cover_empty: bool = True
+    ) -> ColumnarData:
+        """
+        Load data within [start, end] with contract information of template.
+
+        Naive datetime is regarded as in database timezone, and fetch function
+        is called with the same kind of datetime as given. If cover_empty is
+        False, each gap fetched is only regarded as covered until its last
+        data, so that a failed or lagging fetch is not cached as period
+        without data.
+        """
+        # Fetch function is called with naive datetime if given
+        tz: tzinfo | None = DB_TZ if start.tzinfo else None
+
+        s: int = datetime_to_int(start)
+        e: int = datetime_to_int(end)
+
+        # Time after now can not be regarded as covered
+        cover_end: int = min(e, datetime_to_int(datetime.now(DB_TZ)))
+
+        folder: Path = self.get_key_folder(template)
+
+        # Find gaps with lock held, so that index is not changed meanwhile
+        with self.lock, self.get_file_lock(folder):
+            segments: list[dict] = self.read_index(folder)
+
+            touched: list[dict] = [d for d in segments if d["end"] >= s and d["start"] <= e]
+
+            # Find gaps not covered by existing segments
+            gaps: list[tuple[int, int]] = []
+            cursor: int = s
+
+            for d in touched:
+                if d["start"] > cursor:
+                    gaps.append((cursor, d["start"] - 1))
+                cursor = max(cursor, d["end"] + 1)
+
+            if cursor <= e:
+                gaps.append((cursor, e))
+
+            # Fully served by one segment, return memory mapped view
+            if not gaps and len(touched) == 1:
+                data: ColumnarData | None = self.read_segment(folder, touched[0], template)
+
+                if data is not None:
+                    self.hit_count += 1
+
+                    # Access time is kept by segment file, without writing index
+                    self.touch_segment(folder, touched[0])
+
+                    return slice_data(data, s, e)
+
+            self.miss_count += 1
+
+            # Collect pieces of existing segments, memory mapped views stay
+            # valid even if files are removed by other process later
+            pieces: list[tuple[int, int, ColumnarData]] = []
+
+            # Time ranges which can be regarded as covered after fetching
+            covered: list[tuple[int, int]] = []
+
+            for d in touched:
+                data = self.read_segment(folder, d, template)
+
+                # Segment file removed by other process, fetch it again
+                if data is None:
+                    gaps.append((d["start"], d["end"]))
+                else:
+                    pieces.append((d["start"], d["end"], data))
+                    covered.append((d["start"], d["end"]))
+
+        # Fetch gaps without lock, so that other symbols are not blocked
+        gap_covered: bool = False
+
+        for gap_start, gap_end in gaps:
+            gap_data: ColumnarData = template.create_empty()
+            gap_data.extend(fetch(
+                int_to_datetime(gap_start, tz),
+                int_to_datetime(gap_end, tz)
+            ))
+            gap_data = slice_data(gap_data, gap_start, gap_end)
+
+            pieces.append((gap_start, gap_end, gap_data))
+
+            with self.lock:
+                self.fetch_count += 1
+                self.fetch_size += len(gap_data)
+
+            # Time after now can not be regarded as covered
+            gap_cover_end: int = min(gap_end, cover_end)
+
+            # Time after the last data fetched may be not available yet
+            if not cover_empty:
+                if gap_data:
+                    gap_cover_end = min(gap_cover_end, int(gap_data.datetimes[-1]))
+                else:
+                    gap_cover_end = gap_start - 1
+
+            if gap_start <= gap_cover_end:
+                covered.append((gap_start, gap_cover_end))
+                gap_covered = True
+
+        if not gap_covered:
+            return slice_data(merge_pieces(template, pieces), s, e)
+
+        # Merge into index with lock held again
+        with self.lock, self.get_file_lock(folder):
+            segments = self.read_index(folder)
+
+            # Segments may be added by other process while fetching
+            names: set[str] = {d["name"] for d in touched}
+            current: list[dict] = [d for d in segments if d["end"] >= s and d["start"] <= e]
+
+            for d in current:
+                if d["name"] in names:
+                    continue
+
+                data = self.read_segment(folder, d, template)
+                if data is not None:
+                    pieces.append((d["start"], d["end"], data))
+                    covered.append((d["start"], d["end"]))
+
+            result: ColumnarData = merge_pieces(template, pieces)
+
+            # Merge continuous covered ranges, each into one new segment
+            covered.sort()
+            merged: list[list[int]] = []
+
+            for cover_start, cover_stop in covered:
+                if merged and cover_start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], cover_stop)
+                else:
+                    merged.append([cover_start, cover_stop])
+
+            # Files failed to be removed are left for evict to retry
+            for d in current:
+                segments.remove(d)
+                self.remove_segment(folder, d)
+
+            for merged_start, merged_end in merged:
+                merged_data: ColumnarData = slice_data(result, merged_start, merged_end)
+                segments.append(self.write_segment(folder, merged_data, merged_start, merged_end))
+
+            segments.sort(key=lambda d: d["start"])
+            self.write_index(folder, segments)
+
+        self.evict()
+
+        return slice_data(result, s, e)
+
+    def get_statistics(self) -> dict:
+        """
+        Get hit/miss statistics of cache.
+        """
+        total: int = self.hit_count + self.miss_count
+        if total:
+            hit_rate: float = self.hit_count / total
+        else:
+            hit_rate = 0
+
+        return {
+            "hit_count": self.hit_count,
+            "miss_count": self.miss_count,
+            "hit_rate": hit_rate,
+            "fetch_count": self.fetch_count,
+            "fetch_size": self.fetch_size,
+            "evict_count": self.evict_count,
+            "total_bytes": sum(d["nbytes"] for __, d in self.get_all_segments()),
+        }
+
+    def clear(self) -> None:
+        """
+        Remove all cached data.
+        """
+        for folder in self.path.iterdir():
+            if not folder.is_dir():
+                continue
+
+            with self.lock, self.get_file_lock(folder):
+                # Also remove files left by interrupted writing
+                for filepath in folder.glob("*.npy"):
+                    try:
+                        filepath.unlink()
+                    except OSError:
+                        pass
+
+                self.write_index(folder, [])
+
+    def get_file_lock(self, folder: Path) -> "FileLock":
+        """
+        Get lock of one symbol/interval folder shared by all processes.
+        """
+        return FileLock(folder.joinpath(self.lock_filename))
+
+    def get_key_folder(self, template: ColumnarData) -> Path:
+        """
+        Get folder of one symbol/interval.
+        """
+        if template.interval:
+            interval_str: str = template.interval.value
+        else:
+            interval_str = "tick"
+
+        name: str = f"{template.symbol}.{template.exchange.value}.{interval_str}"
+        folder: Path = self.path.joinpath(name)
+        folder.mkdir(exist_ok=True)
+        return folder
+
+    def read_index(self, folder: Path) -> list[dict]:
+        """
+        Read segment list from index file.
+        """
+        filepath: Path = folder.joinpath(self.index_filename)
+        if not filepath.exists():
+            return []
+
+        try:
+            with open(filepath, encoding="UTF-8") as f:
+                segments: list[dict] = json.load(f)
+        except ValueError:
+            return []
+
+        segments.sort(key=lambda d: d["start"])
+        return segments
+
+    def write_index(self, folder: Path, segments: list[dict]) -> None:
+        """
+        Write segment list into index file atomically.
+        """
+        filepath: Path = folder.joinpath(self.index_filename)
+        temp_path: Path = folder.joinpath(f"{self.index_filename}.{uuid4().hex}.tmp")
+
+        with open(temp_path, mode="w", encoding="UTF-8") as f:
+            json.dump(segments, f)
+
+        os.replace(temp_path, filepath)
+
+    def read_segment(self, folder: Path, segment: dict, template: ColumnarData) -> ColumnarData | None:
+        """
+        Read data of one segment with memory mapping.
+        """
+        name: str = segment["name"]
+
+        try:
+            datetimes: np.ndarray = np.load(folder.joinpath(f"{name}.dt.npy"), mmap_mode="r")
+            values: np.ndarray = np.load(folder.joinpath(f"{name}.value.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        return template.create_view(datetimes, values)
+
+    def write_segment(self, folder: Path, data: ColumnarData, start: int, end: int) -> dict:
+        """
+        Write data into new segment files.
+        """
+        name: str = uuid4().hex
+
+        for suffix, array in [("dt", data.datetimes), ("value", data.values)]:
+            filepath: Path = folder.joinpath(f"{name}.{suffix}.npy")
+            temp_path: Path = folder.joinpath(f"{name}.{suffix}.tmp")
+
+            with open(temp_path, mode="wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+
+            os.replace(temp_path, filepath)
+
+        return {
+            "name": name,
+            "start": start,
+            "end": end,
+            "count": len(data),
+            "nbytes": data.nbytes,
+            "access": time(),
+        }
+
+    def touch_segment(self, folder: Path, segment: dict) -> None:
+        """
+        Update access time of one segment by modified time of its file.
+        """
+        try:
+            os.utime(folder.joinpath(f"{segment['name']}.dt.npy"))
+        except OSError:
+            pass
+
+    def get_access_time(self, folder: Path, segment: dict) -> float:
+        """
+        Get last access time of one segment.
+        """
+        try:
+            mtime: float = folder.joinpath(f"{segment['name']}.dt.npy").stat().st_mtime
+        except OSError:
+            mtime = 0
+
+        access: float = segment["access"]
+        return max(access, mtime)
+
+    def remove_segment(self, folder: Path, segment: dict) -> bool:
+        """
+        Remove files of one segment, return whether all removed.
+        """
+        removed: bool = True
+
+        for suffix in ["dt", "value"]:
+            filepath: Path = folder.joinpath(f"{segment['name']}.{suffix}.npy")
+
+            # File may still be memory mapped (on Windows)
+            try:
+                filepath.unlink(missing_ok=True)
+            except OSError:
+                removed = False
+
+        return removed
+
+    def remove_orphans(self, folder: Path, segments: list[dict]) -> None:
+        """
+        Remove segment files not recorded in index, e.g. left by failed removal.
+        """
+        names: set[str] = {d["name"] for d in segments}
+
+        for filepath in folder.glob("*.npy"):
+            if filepath.name.split(".")[0] in names:
+                continue
+
+            try:
+                filepath.unlink()
+            except OSError:
+                pass
+
+    def get_all_segments(self) -> list[tuple[Path, dict]]:
+        """
+        Get segments of all symbols/intervals.
+        """
+        all_segments: list[tuple[Path, dict]] = []
+
+        for folder in self.path.iterdir():
+            if folder.is_dir():
+                for d in self.read_index(folder):
+                    all_segments.append((folder, d))
+
+        return all_segments
+
+    def evict(self) -> None:
+        """
+        Remove least recently used segments until total size within limit.
+
+        Lock of each folder is held in turn, never more than one at a time.
+        """
+        all_segments: list[tuple[Path, dict]] = []
+
+        for folder in self.path.iterdir():
+            if not folder.is_dir():
+                continue
+
+            with self.lock, self.get_file_lock(folder):
+                segments: list[dict] = self.read_index(folder)
+                self.remove_orphans(folder, segments)
+
+            all_segments.extend((folder, d) for d in segments)
+
+        total_bytes: int = sum(d["nbytes"] for __, d in all_segments)
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        all_segments.sort(key=lambda x: self.get_access_time(x[0], x[1]))
+        evicted: dict[Path, set[str]] = {}
+
+        # Always keep the most recently used segment
+        for folder, d in all_segments[:-1]:
+            if total_bytes <= self.max_bytes:
+                break
+
+            evicted.setdefault(folder, set()).add(d["name"])
+            total_bytes -= d["nbytes"]
+
+        for folder, names in evicted.items():
+            with self.lock, self.get_file_lock(folder):
+                # Index may be changed by other process since read above
+                segments = self.read_index(folder)
+                kept: list[dict] = []
+
+                for d in segments:
+                    # Keep segment in index if its files can not be removed now
+                    if d["name"] in names and self.remove_segment(folder, d):
+                        self.evict_count += 1
+                    else:
+                        kept.append(d)
+
+                if len(kept) < len(segments):
+                    self.write_index(folder, kept)
+
+
+class FileLock:
+    """
+    Exclusive lock of a file shared by processes, used as context manager.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """"""
+        self.path: Path = path
+        self.file: TextIO | None = None
+
+    def __enter__(self) -> "FileLock":
+        """"""
+        self.file = open(self.path, mode="a+")
+
+        if sys.platform == "win32":
+            # Lock first byte, retrying until acquired
+            while True:
+                try:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        else:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None
+    ) -> None:
+        """"""
+        if not self.file:
+            return
+
+        if sys.platform == "win32":
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+        self.file.close()
+        self.file = None
+
+
+class EvaluationCache:
+    """
+    Optimization evaluation results stored in local SQLite database.
+
+    Each (setting, target_value, statistics) result is keyed by hash of
+    strategy class source, backtesting parameters and the setting. WAL mode
+    allows worker processes to read and write the same file concurrently.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """"""
+        if path:
+            self.path: Path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            self.path = get_file_path("cta_evaluation_cache.db")
+
+        self.connection: sqlite3.Connection | None = None
+
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+
+    def __getstate__(self) -> dict:
+        """
+        Only path is pickled, connection is opened again in other processes.
+        """
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        """"""
+        self.path = state["path"]
+        self.connection = None
+
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Open database connection lazily in current process.
+        """
+        if not self.connection:
+            self.connection = sqlite3.connect(self.path, timeout=60)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS evaluation "
+                "(key TEXT PRIMARY KEY, result BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            self.connection.commit()
+
+        return self.connection
+
+    def get(self, key: str) -> tuple | None:
+        """
+        Get cached evaluation result, return None if not found.
+        """
+        row: tuple | None = self.get_connection().execute(
+            "SELECT result FROM evaluation WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self.miss_count += 1
+            return None
+
+        self.hit_count += 1
+        result: tuple = pickle.loads(row[0])
+        return result
+
+    def put(self, key: str, result: tuple) -> None:
+        """
+        Save evaluation result.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO evaluation (key, result, created) VALUES (?, ?, ?)",
+            (key, pickle.dumps(result), time())
+        )
+        connection.commit()
+
+    def clear(self) -> None:
+        """
+        Remove all cached results.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+        connection.execute("DELETE FROM evaluation")
+        connection.commit()
+
+    def close(self) -> None:
+        """"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def count(self) -> int:
+        """
+        Get number of cached results.
+        """
+        row: tuple = self.get_connection().execute("SELECT COUNT(*) FROM evaluation").fetchone()
+        return int(row[0])
+
+
+class OptimizationCheckpoint:
+    """
+    Append-only file of optimization results in JSON lines format.
+
+    Each line saves setting, target value and full statistics of one
+    evaluation together with key of the optimization, so that restarting the
+    same optimization can skip settings already recorded. Numpy values are
+    saved as Python numbers, and dates as ISO format strings.
+    """
+
+    def __init__(self, path: str | Path, key: str) -> None:
+        """"""
+        self.path: Path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.key: str = key
+        self.file: TextIO | None = None
+
+    def load(self) -> list[tuple]:
+        """
+        Load recorded results of the same optimization.
+
+        Incomplete last line left by a crashed process is ignored.
+        """
+        if not self.path.exists():
+            return []
+
+        results: list[tuple] = []
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record: dict = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if record.get("key", None) == self.key:
+                    statistics: dict = record["statistics"]
+
+                    # Restore dates saved as ISO format strings
+                    for name in ["start_date", "end_date"]:
+                        value: Any = statistics.get(name, None)
+                        if isinstance(value, str) and value:
+                            statistics[name] = date.fromisoformat(value)
+
+                    results.append((record["setting"], record["target_value"], statistics))
+
+        return results
+
+    def append(self, result: tuple) -> None:
+        """
+        Append one result and flush it to disk immediately.
+        """
+        if not self.file:
+            interrupted: bool = False
+
+            # Start on a new line if last write was interrupted
+            if self.path.exists() and self.path.stat().st_size:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    interrupted = f.read(1) != b"\n"
+
+            self.file = open(self.path, "a", encoding="utf-8")
+            if interrupted:
+                self.file.write("\n")
+
+        setting, target_value, statistics = result
+        record: dict = {
+            "key": self.key,
+            "setting": setting,
+            "target_value": target_value,
+            "statistics": statistics
+        }
+
+        self.file.write(json.dumps(record, ensure_ascii=False, default=to_json_value) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        """"""
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+@dataclass(eq=False)
+class SharedQuery:
+    """
+    History query shared by requests of ranges it covers.
+    """
+
+    start: datetime
+    end: datetime
+    created: float
+    future: Future = field(default_factory=Future)
+
+
+class HistoryQueryCoalescer:
+    """
+    In-memory sharing of history queries among requests.
+
+    Requests of the same key (e.g. vt_symbol and interval) are served from a
+    query which covers their range, by slicing its data. Otherwise a new
+    query is started, and other requests arriving meanwhile wait for it
+    instead of querying again. Results are kept until max_age seconds
+    after the query started, so that later requests of nested ranges are
+    also served without querying. Each request gets its own copy of data
+    objects.
+    """
+
+    def __init__(self, max_age: float) -> None:
+        """"""
+        self.max_age: float = max_age
+
+        self.queries: dict[Hashable, list[SharedQuery]] = {}
+        self.lock: Lock = Lock()
+
+    def query(
+        self,
+        key: Hashable,
+        start: datetime,
+        end: datetime,
+        func: FETCH_FUNC
+    ) -> list:
+        """
+        Get data within [start, end], func(start, end) is called if no query can be shared.
+        """
+        with self.lock:
+            self.remove_expired()
+
+            # Queries ending too early miss data requested
+            shared: SharedQuery | None = None
+            for q in self.queries.get(key, []):
+                if q.start <= start and q.end >= end - timedelta(seconds=self.max_age):
+                    shared = q
+                    break
+
+            if not shared:
+                shared = SharedQuery(start, end, time())
+                self.queries.setdefault(key, []).append(shared)
+                owner: bool = True
+            else:
+                owner = False
+
+        if owner:
+            try:
+                shared.future.set_result(func(start, end))
+            except Exception as e:
+                shared.future.set_exception(e)
+
+                # Failed query should not be shared by requests arriving later
+                with self.lock:
+                    self.remove_query(key, shared)
+
+        data: list = shared.future.result()
+
+        # Data is sorted by datetime, slice out requested range
+        if shared.start != start or shared.end != end:
+            ix_start: int = bisect_left(data, start, key=get_datetime)
+            ix_end: int = bisect_right(data, end, key=get_datetime)
+            data = data[ix_start:ix_end]
+
+        return [copy(d) for d in data]
+
+    def remove_expired(self) -> None:
+        """
+        Remove finished queries older than max_age, called with lock held.
+        """
+        expire_time: float = time() - self.max_age
+
+        for key, queries in list(self.queries.items()):
+            for q in list(queries):
+                if q.future.done() and q.created < expire_time:
+                    self.remove_query(key, q)
+
+    def remove_query(self, key: Hashable, shared: SharedQuery) -> None:
+        """
+        Remove query of key, called with lock held.
+        """
+        queries: list[SharedQuery] = self.queries.get(key, [])
+        if shared in queries:
+            queries.remove(shared)
+
+        if not queries:
+            self.queries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all queries kept.
+        """
+        with self.lock:
+            self.queries.clear()
+
+
+def get_datetime(data: BarData | TickData) -> datetime:
+    """
+    Get datetime of bar/tick, used as sort key.
+    """
+    return data.datetime
+
+
+def to_json_value(value: Any) -> Any:
+    """
+    Convert value not supported by json module.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def hash_evaluation(strategy_class: type, parameters: dict) -> str:
+    """
+    Get stable hash of strategy class source and backtesting parameters.
+    """
+    try:
+        source: str = inspect.getsource(strategy_class)
+    except (OSError, TypeError):
+        source = f"{strategy_class.__module__}.{strategy_class.__qualname__}"
+
+    content: str = json.dumps(parameters, sort_keys=True, default=str)
+    return hashlib.sha256((source + content).encode()).hexdigest()
+
+
+def hash_setting(prefix: str, setting: dict) -> str:
+    """
+    Get stable hash of one setting under evaluation prefix.
+    """
+    content: str = json.dumps(setting, sort_keys=True, default=str)
+    return hashlib.sha256((prefix + content).encode()).hexdigest()
+
+
+def merge_pieces(template: ColumnarData, pieces: list[tuple[int, int, ColumnarData]]) -> ColumnarData:
+    """
+    Concatenate pieces of (start, end, data) in time order, skipping overlapped part.
+    """
+    result: ColumnarData = template.create_empty()
+    cursor: int | None = None
+
+    for start, end, data in sorted(pieces, key=lambda p: (p[0], -p[1])):
+        if cursor is not None:
+            if end <= cursor:
+                continue
+
+            if start <= cursor:
+                data = slice_data(data, cursor + 1, end)
+
+        result.extend(data)
+        cursor = end
+
+    result.consolidate()
+    return result
+
+
+def slice_data(data: ColumnarData, start: int, end: int) -> ColumnarData:
+    """
+    Get zero-copy view of data within [start, end].
+    """
+    data.consolidate()
+
+    ix_start: int = int(np.searchsorted(data.datetimes, start, side="left"))
+    ix_end: int = int(np.searchsorted(data.datetimes, end, side="right"))
+    return data[ix_start:ix_end]
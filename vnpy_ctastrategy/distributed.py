@@ -0,0 +1,679 @@
+"""
+Distributed optimization with evaluate jobs dispatched through a job queue.
+
+Coordinator pushes pickled evaluate function and settings into the queue, and
+worker processes started from command line on any host which can access the
+queue pull jobs, run them and send results back. The default implementation
+stores the queue in a SQLite file, which can be put on a shared folder with
+working file locks for workers on other hosts.
+
+Jobs are transferred as pickled data, and unpickling can run arbitrary code.
+Anyone who can write the queue file can run code on every worker host, so the
+file must only be writable by trusted users. A shared key can be given (key
+argument, --key-file option or VNPY_CTA_QUEUE_KEY environment variable) to
+sign every payload with HMAC, then payloads without valid signature are
+rejected before unpickling.
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import pickle
+import socket
+import sqlite3
+import sys
+import traceback
+from collections.abc import Callable, Iterator
+from multiprocessing import get_context
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from random import random, choice
+from threading import Event, Thread
+from time import perf_counter, sleep, time
+from typing import Any
+
+from deap import creator, base, tools, algorithms
+from tqdm import tqdm
+from vnpy.trader.optimize import OptimizationSetting
+
+from .locale import _
+
+
+# Target value assigned to GA individuals whose evaluation failed on all attempts
+FAILED_TARGET_VALUE: float = -1e9
+
+# Environment variable of key used to sign payloads
+KEY_ENV: str = "VNPY_CTA_QUEUE_KEY"
+
+# Size of HMAC-SHA256 signature put before each payload
+SIGNATURE_SIZE: int = 32
+
+
+class JobQueue:
+    """
+    Job queue stored in SQLite database file.
+
+    Each job is claimed by one worker, which keeps updating heartbeat while
+    running it. Jobs of workers without heartbeat for longer than timeout are
+    considered crashed and handed out again, until max_attempts is reached.
+
+    If key is given (or set by environment variable), payloads are signed and
+    verified with it, and the same key must be used by coordinator and workers.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        timeout: float = 60,
+        max_attempts: int = 3,
+        key: str | bytes = ""
+    ) -> None:
+        """"""
+        self.path: Path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.timeout: float = timeout
+        self.max_attempts: int = max_attempts
+
+        if not key:
+            key = os.environ.get(KEY_ENV, "")
+
+        if isinstance(key, str):
+            key = key.encode("UTF-8")
+        self.key: bytes = key
+
+        self.connection: sqlite3.Connection | None = None
+
+        # Unpickled evaluate functions: task_id -> func
+        self.funcs: dict[int, Callable] = {}
+
+    def __getstate__(self) -> dict:
+        """
+        Only settings are pickled, connection is opened again in other processes.
+        """
+        return {
+            "path": self.path,
+            "timeout": self.timeout,
+            "max_attempts": self.max_attempts,
+            "key": self.key
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        """"""
+        self.path = state["path"]
+        self.timeout = state["timeout"]
+        self.max_attempts = state["max_attempts"]
+        self.key = state["key"]
+
+        self.connection = None
+        self.funcs = {}
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Open database connection lazily in current process.
+
+        Autocommit mode is used, so that claiming a job can be done in an
+        explicit immediate transaction. Rollback journal is used instead of
+        WAL, which needs shared memory of one host and does not work on
+        network file systems. Locked database is waited for by busy timeout.
+        """
+        if not self.connection:
+            self.connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self.connection.execute("PRAGMA busy_timeout=60000")
+            self.connection.execute("PRAGMA journal_mode=DELETE")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS task "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, func BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS job "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, task_id INTEGER NOT NULL, "
+                "ix INTEGER NOT NULL, arg BLOB NOT NULL, status TEXT NOT NULL, "
+                "worker TEXT, heartbeat REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "result BLOB, error TEXT, done_seq INTEGER)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS job_status ON job (status)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS job_done ON job (task_id, done_seq)")
+
+        return self.connection
+
+    def close(self) -> None:
+        """"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def dumps(self, obj: Any) -> bytes:
+        """
+        Pickle object, with signature put before if key is set.
+        """
+        data: bytes = pickle.dumps(obj)
+
+        if self.key:
+            return hmac.new(self.key, data, hashlib.sha256).digest() + data
+        return data
+
+    def loads(self, payload: bytes) -> Any:
+        """
+        Unpickle payload, only after its signature verified if key is set.
+        """
+        if self.key:
+            signature: bytes = payload[:SIGNATURE_SIZE]
+            payload = payload[SIGNATURE_SIZE:]
+
+            if not hmac.compare_digest(signature, hmac.new(self.key, payload, hashlib.sha256).digest()):
+                raise ValueError(_("任务队列数据签名校验失败"))
+
+        return pickle.loads(payload)
+
+    def create_task(self, func: Callable, args: list) -> int:
+        """
+        Push one job for each argument of evaluate function, and return task id.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor: sqlite3.Cursor = connection.execute(
+                "INSERT INTO task (func, created) VALUES (?, ?)",
+                (self.dumps(func), time())
+            )
+            task_id: int = int(cursor.lastrowid or 0)
+
+            connection.executemany(
+                "INSERT INTO job (task_id, ix, arg, status) VALUES (?, ?, ?, 'pending')",
+                [(task_id, ix, self.dumps(arg)) for ix, arg in enumerate(args)]
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        return task_id
+
+    def remove_task(self, task_id: int) -> None:
+        """
+        Remove task and all its jobs, including those still pending.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM job WHERE task_id = ?", (task_id,))
+        connection.execute("DELETE FROM task WHERE id = ?", (task_id,))
+        connection.execute("COMMIT")
+
+    def fetch_job(self, worker: str) -> tuple[int, int, bytes] | None:
+        """
+        Claim one pending job and return (job_id, task_id, pickled arg).
+
+        Running jobs with expired heartbeat are reclaimed first. Arg is left
+        pickled, so that job with invalid payload can be failed by worker.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now: float = time()
+
+            expired: list[tuple] = connection.execute(
+                "SELECT id FROM job WHERE status = 'running' AND heartbeat < ?",
+                (now - self.timeout,)
+            ).fetchall()
+
+            for row in expired:
+                self.release_job(connection, row[0], _("工作进程心跳超时"))
+
+            job: tuple | None = connection.execute(
+                "SELECT id, task_id, arg FROM job WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+
+            if job:
+                connection.execute(
+                    "UPDATE job SET status = 'running', worker = ?, heartbeat = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    (worker, now, job[0])
+                )
+
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        if not job:
+            return None
+
+        return job[0], job[1], job[2]
+
+    def get_task_func(self, task_id: int) -> Callable:
+        """
+        Get evaluate function of task, unpickled only once in each process.
+        """
+        func: Callable | None = self.funcs.get(task_id, None)
+
+        if not func:
+            row: tuple = self.get_connection().execute(
+                "SELECT func FROM task WHERE id = ?", (task_id,)
+            ).fetchone()
+
+            func = self.loads(row[0])
+            self.funcs[task_id] = func
+
+        return func
+
+    def update_heartbeat(self, job_id: int) -> None:
+        """"""
+        self.get_connection().execute(
+            "UPDATE job SET heartbeat = ? WHERE id = ? AND status = 'running'",
+            (time(), job_id)
+        )
+
+    def finish_job(self, job_id: int, result: Any) -> None:
+        """
+        Save result of job.
+
+        Result of a job which has been reclaimed and finished by another
+        worker meanwhile is ignored.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute(
+            "UPDATE job SET status = 'done', result = ?, done_seq = ? "
+            "WHERE id = ? AND status = 'running'",
+            (self.dumps(result), self.get_done_seq(connection), job_id)
+        )
+        connection.execute("COMMIT")
+
+    def fail_job(self, job_id: int, error: str) -> None:
+        """
+        Put failed job back into queue, or mark it failed after max attempts.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        self.release_job(connection, job_id, error)
+        connection.execute("COMMIT")
+
+    def release_job(self, connection: sqlite3.Connection, job_id: int, error: str) -> None:
+        """
+        Release running job within current transaction.
+        """
+        row: tuple | None = connection.execute(
+            "SELECT attempts FROM job WHERE id = ? AND status = 'running'", (job_id,)
+        ).fetchone()
+
+        if not row:
+            return
+
+        if row[0] < self.max_attempts:
+            connection.execute(
+                "UPDATE job SET status = 'pending', error = ? WHERE id = ?",
+                (error, job_id)
+            )
+        else:
+            connection.execute(
+                "UPDATE job SET status = 'failed', error = ?, done_seq = ? WHERE id = ?",
+                (error, self.get_done_seq(connection), job_id)
+            )
+
+    def get_done_seq(self, connection: sqlite3.Connection) -> int:
+        """
+        Get next sequence number for finished jobs.
+        """
+        row: tuple = connection.execute("SELECT COALESCE(MAX(done_seq), 0) + 1 FROM job").fetchone()
+        return int(row[0])
+
+    def iter_results(
+        self,
+        task_id: int,
+        total: int,
+        poll_interval: float = 0.5
+    ) -> Iterator[tuple[int, bool, Any]]:
+        """
+        Yield (ix, success, result or error) of jobs in the order they finish.
+        """
+        connection: sqlite3.Connection = self.get_connection()
+
+        count: int = 0
+        last_seq: int = 0
+
+        while count < total:
+            rows: list[tuple] = connection.execute(
+                "SELECT ix, status, result, error, done_seq FROM job "
+                "WHERE task_id = ? AND done_seq > ? ORDER BY done_seq",
+                (task_id, last_seq)
+            ).fetchall()
+
+            if not rows:
+                sleep(poll_interval)
+                continue
+
+            for ix, status, result, error, done_seq in rows:
+                last_seq = done_seq
+                count += 1
+
+                if status != "done":
+                    yield ix, False, error
+                    continue
+
+                try:
+                    value: Any = self.loads(result)
+                except Exception:
+                    yield ix, False, traceback.format_exc()
+                else:
+                    yield ix, True, value
+
+    def count_jobs(self) -> dict[str, int]:
+        """
+        Get number of jobs in each status.
+        """
+        rows: list[tuple] = self.get_connection().execute(
+            "SELECT status, COUNT(*) FROM job GROUP BY status"
+        ).fetchall()
+        return dict(rows)
+
+
+def run_worker(
+    queue: JobQueue,
+    name: str = "",
+    poll_interval: float = 1,
+    heartbeat_interval: float = 0,
+    idle_timeout: float = 0
+) -> None:
+    """
+    Pull and run jobs until idle for longer than idle_timeout (0 for forever).
+    """
+    if not name:
+        name = f"{socket.gethostname()}-{os.getpid()}"
+
+    # Heartbeat several times within timeout to tolerate slow database writes
+    if not heartbeat_interval:
+        heartbeat_interval = queue.timeout / 4
+
+    idle_start: float = time()
+
+    while True:
+        job: tuple[int, int, bytes] | None = queue.fetch_job(name)
+
+        if not job:
+            if idle_timeout and time() - idle_start > idle_timeout:
+                return
+
+            sleep(poll_interval)
+            continue
+
+        job_id, task_id, arg_data = job
+
+        stop_event: Event = Event()
+        thread: Thread = Thread(
+            target=keep_heartbeat,
+            args=(queue, job_id, stop_event, heartbeat_interval),
+            daemon=True
+        )
+        thread.start()
+
+        try:
+            func: Callable = queue.get_task_func(task_id)
+            arg: Any = queue.loads(arg_data)
+            result: Any = func(arg)
+        except Exception:
+            queue.fail_job(job_id, traceback.format_exc())
+        else:
+            queue.finish_job(job_id, result)
+        finally:
+            stop_event.set()
+            thread.join()
+
+        idle_start = time()
+
+
+def keep_heartbeat(queue: JobQueue, job_id: int, stop_event: Event, interval: float) -> None:
+    """
+    Update heartbeat of running job in background thread.
+    """
+    # SQLite connection can not be shared between threads
+    heartbeat_queue: JobQueue = JobQueue(queue.path, queue.timeout, queue.max_attempts, queue.key)
+
+    while not stop_event.wait(interval):
+        heartbeat_queue.update_heartbeat(job_id)
+
+    heartbeat_queue.close()
+
+
+def run_distributed_bf_optimization(
+    evaluate_func: Callable,
+    optimization_setting: OptimizationSetting,
+    key_func: Callable,
+    queue: JobQueue,
+    output: Callable = print
+) -> list[tuple]:
+    """
+    Run brute force optimization with jobs evaluated by queue workers.
+    """
+    settings: list[dict] = optimization_setting.generate_settings()
+
+    output(_("开始执行分布式穷举算法优化"))
+    output(_("参数优化空间：{}").format(len(settings)))
+
+    start: float = perf_counter()
+
+    task_id: int = queue.create_task(evaluate_func, settings)
+
+    try:
+        results: list[tuple] = list(tqdm(
+            iter_task_results(queue, task_id, settings, output),
+            total=len(settings)
+        ))
+    finally:
+        queue.remove_task(task_id)
+
+    results.sort(reverse=True, key=key_func)
+
+    end: float = perf_counter()
+    cost: int = int(end - start)
+    output(_("穷举算法优化完成，耗时{}秒").format(cost))
+
+    return results
+
+
+def iter_task_results(
+    queue: JobQueue,
+    task_id: int,
+    settings: list[dict],
+    output: Callable = print
+) -> Iterator[tuple]:
+    """
+    Yield results of evaluate task as they complete, skipping failed ones.
+    """
+    for ix, success, value in queue.iter_results(task_id, len(settings)):
+        if success:
+            yield value
+        else:
+            output(_("参数评估失败：{}\n{}").format(settings[ix], value))
+
+
+def run_distributed_ga_optimization(
+    evaluate_func: Callable,
+    optimization_setting: OptimizationSetting,
+    key_func: Callable,
+    queue: JobQueue,
+    pop_size: int = 100,
+    ngen: int = 30,
+    mu: int | None = None,
+    lambda_: int | None = None,
+    cxpb: float = 0.95,
+    mutpb: float | None = None,
+    indpb: float = 1.0,
+    output: Callable = print
+) -> list[tuple]:
+    """
+    Run genetic algorithm optimization with jobs evaluated by queue workers.
+
+    Evolution runs in the coordinator, and individuals of each generation not
+    evaluated before are pushed into the queue as one task.
+    """
+    settings: list[dict] = optimization_setting.generate_settings()
+    parameter_tuples: list[list[tuple]] = [list(d.items()) for d in settings]
+
+    # Results of evaluated individuals, failed ones are saved as None
+    cache: dict[tuple, tuple | None] = {}
+
+    def generate_parameter() -> list:
+        """"""
+        return choice(parameter_tuples)
+
+    def mutate_individual(individual: list, indpb: float) -> tuple:
+        """"""
+        size: int = len(individual)
+        paramlist: list = generate_parameter()
+        for i in range(size):
+            if random() < indpb:
+                individual[i] = paramlist[i]
+        return individual,
+
+    def evaluate_individuals(func: Callable, individuals: list) -> list[tuple[float]]:
+        """
+        Replacement of toolbox map which evaluates individuals through queue.
+        """
+        keys: list[tuple] = [tuple(individual) for individual in individuals]
+        missing: list[tuple] = list(dict.fromkeys(k for k in keys if k not in cache))
+
+        if missing:
+            task_id: int = queue.create_task(evaluate_func, [dict(k) for k in missing])
+
+            try:
+                for ix, success, value in queue.iter_results(task_id, len(missing)):
+                    if success:
+                        cache[missing[ix]] = value
+                    else:
+                        cache[missing[ix]] = None
+                        output(_("参数评估失败：{}\n{}").format(dict(missing[ix]), value))
+            finally:
+                queue.remove_task(task_id)
+
+        fitnesses: list[tuple[float]] = []
+        for k in keys:
+            result: tuple | None = cache[k]
+            if result is None:
+                fitnesses.append((FAILED_TARGET_VALUE,))
+            else:
+                fitnesses.append((key_func(result),))
+        return fitnesses
+
+    def evaluate_individual(individual: list) -> tuple[float]:
+        """"""
+        return evaluate_individuals(evaluate_func, [individual])[0]
+
+    toolbox: base.Toolbox = base.Toolbox()
+    toolbox.register("individual", tools.initIterate, creator.Individual, generate_parameter)
+    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+    toolbox.register("mate", tools.cxTwoPoint)
+    toolbox.register("mutate", mutate_individual, indpb=indpb)
+    toolbox.register("select", tools.selNSGA2)
+    toolbox.register("map", evaluate_individuals)
+    toolbox.register("evaluate", evaluate_individual)
+
+    if mu is None:
+        mu = int(pop_size * 0.8)
+
+    if lambda_ is None:
+        lambda_ = pop_size
+
+    if mutpb is None:
+        mutpb = 1.0 - cxpb
+
+    pop: list = toolbox.population(pop_size)
+
+    output(_("开始执行分布式遗传算法优化"))
+    output(_("参数优化空间：{}").format(len(parameter_tuples)))
+    output(_("每代族群总数：{}").format(pop_size))
+    output(_("优良筛选个数：{}").format(mu))
+    output(_("迭代次数：{}").format(ngen))
+    output(_("交叉概率：{:.0%}").format(cxpb))
+    output(_("突变概率：{:.0%}").format(mutpb))
+    output(_("个体突变概率：{:.0%}").format(indpb))
+
+    start: float = perf_counter()
+
+    algorithms.eaMuPlusLambda(
+        pop,
+        toolbox,
+        mu,
+        lambda_,
+        cxpb,
+        mutpb,
+        ngen,
+        verbose=True
+    )
+
+    end: float = perf_counter()
+    cost: int = int(end - start)
+    output(_("遗传算法优化完成，耗时{}秒").format(cost))
+
+    results: list[tuple] = [r for r in cache.values() if r is not None]
+    results.sort(reverse=True, key=key_func)
+    return results
+
+
+def main() -> None:
+    """
+    Command line entry point to start queue workers.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Start worker processes of distributed CTA optimization.",
+        epilog=(
+            "Jobs are pickled, and unpickling runs arbitrary code: anyone who can write "
+            "the queue file can run code on this host. Keep the queue file writable only "
+            "by trusted users, and give a shared key with --key-file or the "
+            f"{KEY_ENV} environment variable to reject payloads without valid HMAC signature."
+        )
+    )
+    parser.add_argument("queue", help="path of job queue database file")
+    parser.add_argument("-n", "--processes", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--name", default="", help="worker name prefix, hostname by default")
+    parser.add_argument("--timeout", type=float, default=60, help="heartbeat timeout of crashed workers")
+    parser.add_argument("--max-attempts", type=int, default=3, help="max attempts of each job")
+    parser.add_argument("--poll", type=float, default=1, help="polling interval when queue is empty")
+    parser.add_argument("--idle-timeout", type=float, default=0, help="exit after idle seconds, 0 for never")
+    parser.add_argument("--key-file", default="", help="file of shared key used to verify payloads")
+    parser.add_argument(
+        "--path",
+        action="append",
+        default=[],
+        help="extra import path of strategy modules, may be given multiple times"
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    # Strategy classes are pickled by reference, so their modules must be importable
+    sys.path[:0] = [str(Path(p).resolve()) for p in args.path] + [os.getcwd()]
+
+    key: bytes = b""
+    if args.key_file:
+        key = Path(args.key_file).read_bytes().strip()
+
+    queue: JobQueue = JobQueue(args.queue, args.timeout, args.max_attempts, key)
+    name: str = args.name or socket.gethostname()
+
+    if args.processes <= 1:
+        run_worker(queue, f"{name}-{os.getpid()}", args.poll, idle_timeout=args.idle_timeout)
+        return
+
+    ctx: BaseContext = get_context("spawn")
+    processes: list = []
+
+    for i in range(args.processes):
+        process = ctx.Process(     # type: ignore[attr-defined]
+            target=run_worker,
+            args=(queue, f"{name}-{os.getpid()}-{i}", args.poll),
+            kwargs={"idle_timeout": args.idle_timeout}
+        )
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
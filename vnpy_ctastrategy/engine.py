@@ -8,8 +8,10 @@ from collections.abc import Callable
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
 from copy import copy
+from functools import partial
 from glob import glob
 from concurrent.futures import Future
+from heapq import heappush, heappop, heapify
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine, LogEngine
@@ -38,7 +40,7 @@ from vnpy.trader.constant import (
     Offset,
     Status
 )
-from vnpy.trader.utility import load_json, save_json, extract_vt_symbol, round_to
+from vnpy.trader.utility import extract_vt_symbol, get_file_path, get_folder_path, round_to
 from vnpy.trader.database import BaseDatabase, get_database, DB_TZ
 from vnpy.trader.datafeed import BaseDatafeed, get_datafeed
 
@@ -48,11 +50,15 @@ from .base import (
     EVENT_CTA_STRATEGY,
     EVENT_CTA_STOPORDER,
     EngineType,
+    INTERVAL_DELTA_MAP,
     StopOrder,
     StopOrderStatus,
     STOPORDER_PREFIX
 )
 from .template import CtaTemplate, TargetPosTemplate
+from .cache import HistoryCache, HistoryQueryCoalescer
+from .history import ColumnarData
+from .store import BaseStrategyStore, JsonStrategyStore, SqliteStrategyStore
 from .locale import _
 
 # 停止单状态映射
@@ -73,6 +79,16 @@ class CtaEngine(BaseEngine):
 
     setting_filename: str = "cta_strategy_setting.json"
     data_filename: str = "cta_strategy_data.json"
+    data_write_interval: float = 1                  # seconds of coalescing strategy data writes (json store)
+
+    store_name: str = "json"                        # "json", or "sqlite" to opt in
+    store_filename: str = "cta_strategy.db"
+
+    init_workers: int = 1                           # number of strategies initialized in parallel
+    history_share_seconds: float = 10               # max age of history query shared by load_bar
+
+    bar_cache_folder: str = ""                      # folder of local bar cache, e.g. "cta_bar_cache"
+    bar_cache_size: int = 4 * 1024 ** 3             # max bytes of local bar cache
 
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine) -> None:
         """"""
@@ -91,10 +107,24 @@ class CtaEngine(BaseEngine):
         self.stop_order_count: int = 0                                  # for generating stop_orderid
         self.stop_orders: dict[str, StopOrder] = {}                     # stop_orderid: stop_order
 
-        self.init_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
+        # Heaps of (trigger price, stop order count, stop_orderid) of each
+        # vt_symbol, with short price negated. Cancelled orders are removed lazily.
+        self.long_stop_heaps: defaultdict[str, list[tuple[float, int, str]]] = defaultdict(list)
+        self.short_stop_heaps: defaultdict[str, list[tuple[float, int, str]]] = defaultdict(list)
+
+        self.init_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self.init_workers)
+        self.init_futures: dict[str, Future] = {}                       # strategy_name: future
+
+        self.history_coalescer: HistoryQueryCoalescer = HistoryQueryCoalescer(self.history_share_seconds)
+
+        self.bar_cache: HistoryCache | None = None
+        if self.bar_cache_folder:
+            self.bar_cache = HistoryCache(get_folder_path(self.bar_cache_folder), self.bar_cache_size)
 
         self.vt_tradeids: set = set()                                   # for filtering duplicate trade
 
+        self.store: BaseStrategyStore = self.create_store()
+
         self.database: BaseDatabase = get_database()
         self.datafeed: BaseDatafeed = get_datafeed()
 
@@ -111,6 +141,9 @@ class CtaEngine(BaseEngine):
         """"""
         self.stop_all_strategies()
 
+        # Write all pending strategy data before exit
+        self.store.close()
+
     def register_event(self) -> None:
         """"""
         self.event_engine.register(EVENT_TICK, self.process_tick_event)
@@ -219,66 +252,113 @@ class CtaEngine(BaseEngine):
 
     def check_stop_order(self, tick: TickData) -> None:
         """"""
-        for stop_order in list(self.stop_orders.values()):
-            if stop_order.vt_symbol != tick.vt_symbol:
+        for entry, heap in self.get_triggered_stop_orders(tick):
+            # Stop order may be cancelled by callback of another one triggered before
+            stop_order: StopOrder | None = self.stop_orders.get(entry[2], None)
+            if not stop_order:
                 continue
 
-            long_triggered = (
-                stop_order.direction == Direction.LONG and tick.last_price >= stop_order.price
-            )
-            short_triggered = (
-                stop_order.direction == Direction.SHORT and tick.last_price <= stop_order.price
-            )
+            self.trigger_stop_order(stop_order, tick)
 
-            if long_triggered or short_triggered:
-                strategy: CtaTemplate = self.strategies[stop_order.strategy_name]
-
-                # To get excuted immediately after stop order is
-                # triggered, use limit price if available, otherwise
-                # use ask_price_5 or bid_price_5
-                if stop_order.direction == Direction.LONG:
-                    if tick.limit_up:
-                        price = tick.limit_up
-                    else:
-                        price = tick.ask_price_5
-                else:
-                    if tick.limit_down:
-                        price = tick.limit_down
-                    else:
-                        price = tick.bid_price_5
-
-                contract: ContractData | None = self.main_engine.get_contract(stop_order.vt_symbol)
-                if not contract:
-                    continue
-
-                vt_orderids: list = self.send_limit_order(
-                    strategy,
-                    contract,
-                    stop_order.direction,
-                    stop_order.offset,
-                    price,
-                    stop_order.volume,
-                    stop_order.lock,
-                    stop_order.net
-                )
+            # Keep in heap if limit order not placed, e.g. contract not found
+            if stop_order.stop_orderid in self.stop_orders:
+                heappush(heap, entry)
+
+    def get_triggered_stop_orders(self, tick: TickData) -> list[tuple[tuple[float, int, str], list]]:
+        """
+        Pop entries of stop orders triggered by tick from heaps of its vt_symbol.
+
+        Triggered entries are returned together with their heaps, sorted by
+        stop order count which is the same as sending sequence.
+        """
+        triggered: list[tuple[tuple[float, int, str], list]] = []
+
+        long_heap: list[tuple[float, int, str]] | None = self.long_stop_heaps.get(tick.vt_symbol, None)
+        if long_heap:
+            while long_heap and long_heap[0][0] <= tick.last_price:
+                entry: tuple[float, int, str] = heappop(long_heap)
+                if entry[2] in self.stop_orders:
+                    triggered.append((entry, long_heap))
+
+        short_heap: list[tuple[float, int, str]] | None = self.short_stop_heaps.get(tick.vt_symbol, None)
+        if short_heap:
+            while short_heap and -short_heap[0][0] >= tick.last_price:
+                entry = heappop(short_heap)
+                if entry[2] in self.stop_orders:
+                    triggered.append((entry, short_heap))
+
+        triggered.sort(key=lambda x: x[0][1])
+        return triggered
+
+    def trigger_stop_order(self, stop_order: StopOrder, tick: TickData) -> None:
+        """
+        Send limit order for triggered stop order.
+        """
+        strategy: CtaTemplate = self.strategies[stop_order.strategy_name]
 
-                # Update stop order status if placed successfully
-                if vt_orderids:
-                    # Remove from relation map.
-                    self.stop_orders.pop(stop_order.stop_orderid)
+        # To get excuted immediately after stop order is
+        # triggered, use limit price if available, otherwise
+        # use ask_price_5 or bid_price_5
+        if stop_order.direction == Direction.LONG:
+            if tick.limit_up:
+                price = tick.limit_up
+            else:
+                price = tick.ask_price_5
+        else:
+            if tick.limit_down:
+                price = tick.limit_down
+            else:
+                price = tick.bid_price_5
+
+        contract: ContractData | None = self.main_engine.get_contract(stop_order.vt_symbol)
+        if not contract:
+            return
+
+        vt_orderids: list = self.send_limit_order(
+            strategy,
+            contract,
+            stop_order.direction,
+            stop_order.offset,
+            price,
+            stop_order.volume,
+            stop_order.lock,
+            stop_order.net
+        )
 
-                    strategy_vt_orderids: set = self.strategy_orderid_map[strategy.strategy_name]
-                    if stop_order.stop_orderid in strategy_vt_orderids:
-                        strategy_vt_orderids.remove(stop_order.stop_orderid)
+        # Update stop order status if placed successfully
+        if vt_orderids:
+            # Remove from relation map.
+            self.stop_orders.pop(stop_order.stop_orderid)
 
-                    # Change stop order status to cancelled and update to strategy.
-                    stop_order.status = StopOrderStatus.TRIGGERED
-                    stop_order.vt_orderids = vt_orderids
+            strategy_vt_orderids: set = self.strategy_orderid_map[strategy.strategy_name]
+            if stop_order.stop_orderid in strategy_vt_orderids:
+                strategy_vt_orderids.remove(stop_order.stop_orderid)
 
-                    self.call_strategy_func(
-                        strategy, strategy.on_stop_order, stop_order
-                    )
-                    self.put_stop_order_event(stop_order)
+            # Change stop order status to cancelled and update to strategy.
+            stop_order.status = StopOrderStatus.TRIGGERED
+            stop_order.vt_orderids = vt_orderids
+
+            self.call_strategy_func(
+                strategy, strategy.on_stop_order, stop_order
+            )
+            self.put_stop_order_event(stop_order)
+
+    def compact_stop_heaps(self, vt_symbol: str) -> None:
+        """
+        Rebuild stop order heaps of vt_symbol when too many cancelled entries left.
+        """
+        long_heap: list[tuple[float, int, str]] = self.long_stop_heaps[vt_symbol]
+        short_heap: list[tuple[float, int, str]] = self.short_stop_heaps[vt_symbol]
+
+        if len(long_heap) + len(short_heap) <= len(self.stop_orders) * 2 + 64:
+            return
+
+        active: dict[str, StopOrder] = self.stop_orders
+        long_heap[:] = [x for x in long_heap if x[2] in active]
+        short_heap[:] = [x for x in short_heap if x[2] in active]
+
+        heapify(long_heap)
+        heapify(short_heap)
 
     def send_server_order(
         self,
@@ -421,6 +501,19 @@ class CtaEngine(BaseEngine):
 
         self.stop_orders[stop_orderid] = stop_order
 
+        self.compact_stop_heaps(stop_order.vt_symbol)
+
+        if direction == Direction.LONG:
+            heappush(
+                self.long_stop_heaps[stop_order.vt_symbol],
+                (price, self.stop_order_count, stop_orderid)
+            )
+        else:
+            heappush(
+                self.short_stop_heaps[stop_order.vt_symbol],
+                (-price, self.stop_order_count, stop_orderid)
+            )
+
         vt_orderids: set = self.strategy_orderid_map[strategy.strategy_name]
         vt_orderids.add(stop_orderid)
 
@@ -553,9 +646,73 @@ class CtaEngine(BaseEngine):
         use_database: bool
     ) -> list[BarData]:
         """"""
-        symbol, exchange = extract_vt_symbol(vt_symbol)
         end: datetime = datetime.now(DB_TZ)
         start: datetime = end - timedelta(days)
+
+        # Bars from gateway and datafeed are kept in local cache
+        if self.bar_cache and not use_database and interval in INTERVAL_DELTA_MAP:
+            func: Callable = partial(self.load_bar_from_cache, vt_symbol, interval)
+        else:
+            func = partial(self.query_bar, vt_symbol, interval, use_database)
+
+        # Strategies of same vt_symbol and interval share one query
+        bars: list[BarData] = self.history_coalescer.query(
+            (vt_symbol, interval, use_database),
+            start,
+            end,
+            func
+        )
+        return bars
+
+    def load_bar_from_cache(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> list[BarData]:
+        """
+        Load bars from local cache, querying only those not cached yet.
+
+        Bars within the last interval may be unfinished, so they are queried
+        every time and never cached.
+        """
+        if not self.bar_cache:
+            return []
+
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+        cache_end: datetime = end - INTERVAL_DELTA_MAP[interval]
+
+        # Period after the last bar fetched may be missing by query failure or lag, so not cached
+        data: ColumnarData = self.bar_cache.load_bar_data(
+            symbol,
+            exchange,
+            interval,
+            start,
+            cache_end,
+            partial(self.query_bar, vt_symbol, interval, False),
+            cover_empty=False
+        )
+        bars: list[BarData] = data.to_list()
+
+        for bar in self.query_bar(vt_symbol, interval, False, cache_end, end):
+            if bar.datetime > cache_end:
+                bars.append(bar)
+
+        return bars
+
+    def query_bar(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        use_database: bool,
+        start: datetime,
+        end: datetime
+    ) -> list[BarData]:
+        """
+        Query bar data from gateway, datafeed or database.
+        """
+        symbol, exchange = extract_vt_symbol(vt_symbol)
         bars: list[BarData] = []
 
         # Pass gateway and datafeed if use_database set to True
@@ -666,7 +823,14 @@ class CtaEngine(BaseEngine):
         """
         Init a strategy.
         """
-        return self.init_executor.submit(self._init_strategy, strategy_name)
+        # Avoid running init of the same strategy in parallel
+        future: Future | None = self.init_futures.get(strategy_name, None)
+        if future and not future.done():
+            return future
+
+        future = self.init_executor.submit(self._init_strategy, strategy_name)
+        self.init_futures[strategy_name] = future
+        return future
 
     def _init_strategy(self, strategy_name: str) -> None:
         """
@@ -742,6 +906,7 @@ class CtaEngine(BaseEngine):
 
         # Sync strategy variables to data file
         self.sync_strategy_data(strategy)
+        self.store.flush()
 
         # Update GUI
         self.put_strategy_event(strategy)
@@ -830,22 +995,50 @@ class CtaEngine(BaseEngine):
             msg: str = _("策略文件{}加载失败，触发异常：\n{}").format(module_name, traceback.format_exc())
             self.write_log(msg)
 
+    def create_store(self) -> BaseStrategyStore:
+        """
+        Create store of strategy setting and data.
+
+        Json files are imported into sqlite store when it is used first time,
+        and changes of json files made after that are not loaded any more.
+        """
+        if self.store_name == "json":
+            return JsonStrategyStore(
+                self.setting_filename,
+                self.data_filename,
+                self.data_write_interval,
+                self.write_log
+            )
+
+        store: SqliteStrategyStore = SqliteStrategyStore(self.store_filename)
+        if store.import_json(self.setting_filename, self.data_filename):
+            self.write_log(_("策略配置和数据已从json文件导入{}").format(store.path))
+            return store
+
+        import_time: float | None = store.get_import_time()
+        for filename in [self.setting_filename, self.data_filename]:
+            filepath: Path = get_file_path(filename)
+            if import_time and filepath.exists() and filepath.stat().st_mtime > import_time:
+                self.write_log(_("json文件{}在导入{}后被修改，修改内容不会生效").format(filepath, store.path))
+
+        return store
+
     def load_strategy_data(self) -> None:
         """
-        Load strategy data from json file.
+        Load data of strategies added from store.
         """
-        self.strategy_data = load_json(self.data_filename)
+        self.strategy_data = self.store.load_data(list(self.strategies.keys()))
 
     def sync_strategy_data(self, strategy: CtaTemplate) -> None:
         """
-        Sync strategy data into json file.
+        Sync strategy data into store.
         """
         data: dict = strategy.get_variables()
         data.pop("inited")      # Strategy status (inited, trading) should not be synced.
         data.pop("trading")
 
         self.strategy_data[strategy.strategy_name] = data
-        save_json(self.data_filename, self.strategy_data)
+        self.store.save_data(strategy.strategy_name, data)
 
     def get_all_strategy_class_names(self) -> list:
         """
@@ -894,9 +1087,9 @@ class CtaEngine(BaseEngine):
 
     def load_strategy_setting(self) -> None:
         """
-        Load setting file.
+        Load setting of all strategies from store.
         """
-        self.strategy_setting = load_json(self.setting_filename)
+        self.strategy_setting = self.store.load_setting()
 
         for strategy_name, strategy_config in self.strategy_setting.items():
             self.add_strategy(
@@ -908,7 +1101,7 @@ class CtaEngine(BaseEngine):
 
     def update_strategy_setting(self, strategy_name: str, setting: dict) -> None:
         """
-        Update setting file.
+        Update setting of one strategy in store.
         """
         strategy: CtaTemplate = self.strategies[strategy_name]
 
@@ -917,20 +1110,18 @@ class CtaEngine(BaseEngine):
             "vt_symbol": strategy.vt_symbol,
             "setting": setting,
         }
-        save_json(self.setting_filename, self.strategy_setting)
+        self.store.save_setting(strategy_name, self.strategy_setting[strategy_name])
 
     def remove_strategy_setting(self, strategy_name: str) -> None:
         """
-        Update setting file.
+        Remove setting and data of one strategy from store.
         """
         if strategy_name not in self.strategy_setting:
             return
 
         self.strategy_setting.pop(strategy_name)
-        save_json(self.setting_filename, self.strategy_setting)
-
         self.strategy_data.pop(strategy_name, None)
-        save_json(self.data_filename, self.strategy_data)
+        self.store.remove(strategy_name)
 
     def put_stop_order_event(self, stop_order: StopOrder) -> None:
         """
@@ -0,0 +1,384 @@
+"""
+Columnar storage of history data used by backtesting.
+"""
+
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, overload
+
+import numpy as np
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import BarData, TickData
+
+
+BAR_FIELDS: tuple[str, ...] = (
+    "volume",
+    "turnover",
+    "open_interest",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+)
+
+TICK_FIELDS: tuple[str, ...] = (
+    "volume",
+    "turnover",
+    "open_interest",
+    "last_price",
+    "last_volume",
+    "limit_up",
+    "limit_down",
+    "open_price",
+    "high_price",
+    "low_price",
+    "pre_close",
+    *[f"bid_price_{i}" for i in range(1, 6)],
+    *[f"ask_price_{i}" for i in range(1, 6)],
+    *[f"bid_volume_{i}" for i in range(1, 6)],
+    *[f"ask_volume_{i}" for i in range(1, 6)],
+)
+
+EPOCH: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND: timedelta = timedelta(microseconds=1)
+
+
+def datetime_to_int(dt: datetime) -> int:
+    """
+    Convert datetime into microseconds since epoch.
+
+    Naive datetime is regarded as in database timezone.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=DB_TZ)
+    return (dt - EPOCH) // MICROSECOND
+
+
+def int_to_datetime(value: int, tz: tzinfo | None) -> datetime:
+    """
+    Convert microseconds since epoch back into datetime.
+
+    Naive datetime in database timezone is returned if tz is None.
+    """
+    dt: datetime = EPOCH + timedelta(microseconds=value)
+
+    if tz is None:
+        return dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return dt.astimezone(tz)
+
+
+class ColumnarData(Sequence):
+    """
+    History data of one contract stored in contiguous NumPy arrays.
+
+    Datetime is kept as int64 microseconds and all numeric fields are kept in
+    one float64 matrix. BarData/TickData objects are only created when a
+    single row is accessed, so memory usage stays at several tens of bytes per
+    row regardless of the total data size.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval | None = Interval.MINUTE,
+        gateway_name: str = "DB",
+        name: str = "",
+        tz: tzinfo | None = None,
+        datetimes: np.ndarray | None = None,
+        values: np.ndarray | None = None
+    ) -> None:
+        """"""
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.interval: Interval | None = interval
+        self.gateway_name: str = gateway_name
+        self.name: str = name
+        self.tz: tzinfo | None = tz
+
+        # Tick data is stored without interval
+        if interval:
+            self.fields: tuple[str, ...] = BAR_FIELDS
+        else:
+            self.fields = TICK_FIELDS
+
+        if datetimes is None or values is None:
+            datetimes = np.empty(0, dtype=np.int64)
+            values = np.empty((0, len(self.fields)), dtype=np.float64)
+
+        self.datetimes: np.ndarray = datetimes
+        self.values: np.ndarray = values
+
+        self.pending: list[tuple[np.ndarray, np.ndarray]] = []
+
+    def create_empty(self) -> "ColumnarData":
+        """
+        Create an empty columnar data with the same contract information.
+        """
+        return ColumnarData(
+            self.symbol,
+            self.exchange,
+            self.interval,
+            self.gateway_name,
+            self.name,
+            self.tz
+        )
+
+    def create_view(self, datetimes: np.ndarray, values: np.ndarray) -> "ColumnarData":
+        """
+        Create columnar data sharing contract information with given arrays.
+        """
+        return ColumnarData(
+            self.symbol,
+            self.exchange,
+            self.interval,
+            self.gateway_name,
+            self.name,
+            self.tz,
+            datetimes,
+            values
+        )
+
+    def extend(self, data: "list[BarData] | list[TickData] | ColumnarData") -> None:
+        """
+        Append new data to the end.
+
+        Arrays are concatenated lazily on the next read access, so that loading
+        data chunk by chunk does not copy the whole history every time.
+        """
+        if not data:
+            return
+
+        if isinstance(data, ColumnarData):
+            if self.tz is None and not len(self):
+                self.tz = data.tz
+
+            data.consolidate()
+            self.pending.append((data.datetimes, data.values))
+            return
+
+        if self.tz is None and not len(self):
+            self.tz = data[0].datetime.tzinfo
+
+        datetimes: np.ndarray = np.fromiter(
+            (datetime_to_int(d.datetime) for d in data),
+            dtype=np.int64,
+            count=len(data)
+        )
+
+        values: np.ndarray = np.array(
+            [[getattr(d, f) for f in self.fields] for d in data],
+            dtype=np.float64
+        )
+
+        self.pending.append((datetimes, values))
+
+    def consolidate(self) -> None:
+        """
+        Concatenate pending chunks into contiguous arrays.
+        """
+        if not self.pending:
+            return
+
+        self.datetimes = np.concatenate([self.datetimes] + [p[0] for p in self.pending])
+        self.values = np.concatenate([self.values] + [p[1] for p in self.pending])
+        self.pending.clear()
+
+    def clear(self) -> None:
+        """
+        Remove all data.
+        """
+        self.datetimes = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, len(self.fields)), dtype=np.float64)
+        self.pending.clear()
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.datetimes) + sum(len(p[0]) for p in self.pending)
+
+    @overload
+    def __getitem__(self, index: int) -> BarData | TickData:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ColumnarData":
+        ...
+
+    def __getitem__(self, index: int | slice) -> "BarData | TickData | ColumnarData":
+        """
+        Return one row as bar/tick data, or a zero-copy view for slice.
+        """
+        self.consolidate()
+
+        if isinstance(index, slice):
+            return self.create_view(self.datetimes[index], self.values[index])
+
+        return self.create_object(
+            int(self.datetimes[index]),
+            self.values[index].tolist()
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterate over rows with data objects created on the fly.
+        """
+        self.consolidate()
+
+        create_object = self.create_object
+
+        for dt, row in zip(self.datetimes.tolist(), self.values, strict=True):
+            yield create_object(dt, row.tolist())
+
+    def create_object(self, dt: int, row: list[float]) -> BarData | TickData:
+        """
+        Create bar or tick data from one row of arrays.
+        """
+        kwargs: dict = dict(zip(self.fields, row, strict=True))
+
+        if self.interval:
+            return BarData(
+                symbol=self.symbol,
+                exchange=self.exchange,
+                datetime=int_to_datetime(dt, self.tz),
+                interval=self.interval,
+                gateway_name=self.gateway_name,
+                **kwargs
+            )
+        else:
+            return TickData(
+                symbol=self.symbol,
+                exchange=self.exchange,
+                datetime=int_to_datetime(dt, self.tz),
+                name=self.name,
+                gateway_name=self.gateway_name,
+                **kwargs
+            )
+
+    def to_list(self) -> list:
+        """
+        Convert all rows into a list of bar or tick data.
+        """
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Total memory size of arrays.
+        """
+        self.consolidate()
+        return int(self.datetimes.nbytes + self.values.nbytes)
+
+
+@dataclass
+class SharedHistory:
+    """
+    Handle of columnar data published in shared memory.
+
+    The handle is small and picklable, so it can be passed to worker processes
+    which then attach to the same memory block without copying.
+    """
+
+    shm_name: str
+    length: int
+    symbol: str
+    exchange: Exchange
+    interval: Interval | None
+    gateway_name: str
+    name: str = ""
+    tz: tzinfo | None = None
+
+    # Time range covered (including periods without data), 0 if not known
+    start: int = 0
+    end: int = 0
+
+
+# Shared memory attached in current process: shm_name -> (shm, data)
+attached_histories: dict[str, tuple[SharedMemory, ColumnarData]] = {}
+
+
+def publish_history(
+    data: ColumnarData,
+    start: int = 0,
+    end: int = 0
+) -> tuple[SharedMemory, SharedHistory]:
+    """
+    Copy columnar data covering [start, end] into a new shared memory block.
+
+    The caller owns the returned SharedMemory, and should close and unlink it
+    after all worker processes finished.
+    """
+    data.consolidate()
+
+    length: int = len(data)
+    shm: SharedMemory = SharedMemory(create=True, size=max(data.nbytes, 1))
+
+    # Block is not handed to caller if copying fails, so remove it here
+    try:
+        datetimes, values = map_history_arrays(shm, length, len(data.fields))
+        datetimes[:] = data.datetimes
+        values[:] = data.values
+    except BaseException:
+        shm.unlink()
+        raise
+
+    history: SharedHistory = SharedHistory(
+        shm_name=shm.name,
+        length=length,
+        symbol=data.symbol,
+        exchange=data.exchange,
+        interval=data.interval,
+        gateway_name=data.gateway_name,
+        name=data.name,
+        tz=data.tz,
+        start=start,
+        end=end
+    )
+    return shm, history
+
+
+def attach_history(history: SharedHistory) -> ColumnarData:
+    """
+    Attach to published history and return a read-only zero-copy view.
+
+    Attachment is cached, so each process only maps the block once.
+    """
+    if history.shm_name in attached_histories:
+        return attached_histories[history.shm_name][1]
+
+    shm: SharedMemory = SharedMemory(name=history.shm_name)
+
+    data: ColumnarData = ColumnarData(
+        history.symbol,
+        history.exchange,
+        history.interval,
+        history.gateway_name,
+        history.name,
+        history.tz
+    )
+
+    datetimes, values = map_history_arrays(shm, history.length, len(data.fields))
+    datetimes.flags.writeable = False
+    values.flags.writeable = False
+
+    data.datetimes = datetimes
+    data.values = values
+
+    attached_histories[history.shm_name] = (shm, data)
+    return data
+
+
+def map_history_arrays(shm: SharedMemory, length: int, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Create datetime and value arrays on the buffer of shared memory.
+    """
+    datetimes: np.ndarray = np.ndarray((length,), dtype=np.int64, buffer=shm.buf)
+    values: np.ndarray = np.ndarray(
+        (length, width),
+        dtype=np.float64,
+        buffer=shm.buf,
+        offset=datetimes.nbytes
+    )
+    return datetimes, values
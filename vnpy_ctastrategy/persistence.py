@@ -0,0 +1,137 @@
+"""
+Write-behind persistence of json data file.
+"""
+
+import json
+import os
+import traceback
+from collections.abc import Callable
+from pathlib import Path
+from threading import Event, Lock, Thread
+
+from vnpy.trader.utility import get_file_path
+
+from .locale import _
+
+
+class JsonFileWriter:
+    """
+    Keep json file of dict data updated by background thread.
+
+    Keys updated are marked dirty, and all updates within interval are
+    coalesced into one write. File is replaced atomically by renaming a
+    fully written temp file, so it is never left half written.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        interval: float = 1,
+        output: Callable[[str], None] = print
+    ) -> None:
+        """"""
+        self.filepath: Path = get_file_path(filename)
+        self.interval: float = interval
+        self.output: Callable[[str], None] = output
+
+        self.data: dict = {}
+        self.dirty: set[str] = set()
+
+        # Lock of data/dirty, and lock keeping writes in snapshot order
+        self.data_lock: Lock = Lock()
+        self.write_lock: Lock = Lock()
+
+        self.active: bool = True
+        self.dirty_event: Event = Event()
+        self.close_event: Event = Event()
+
+        self.thread: Thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def set_data(self, data: dict) -> None:
+        """
+        Set all data loaded from file without writing.
+        """
+        with self.data_lock:
+            self.data = dict(data)
+            self.dirty.clear()
+
+    def update(self, key: str, value: dict) -> None:
+        """
+        Update value of key, which is written later in background.
+        """
+        with self.data_lock:
+            self.data[key] = value
+            self.dirty.add(key)
+
+        self.dirty_event.set()
+
+    def remove(self, key: str) -> None:
+        """
+        Remove key, which is written later in background.
+        """
+        with self.data_lock:
+            if key not in self.data:
+                return
+
+            self.data.pop(key)
+            self.dirty.add(key)
+
+        self.dirty_event.set()
+
+    def flush(self) -> None:
+        """
+        Write pending updates immediately in caller thread.
+        """
+        with self.write_lock:
+            with self.data_lock:
+                if not self.dirty:
+                    return
+
+                data: dict = dict(self.data)
+                self.dirty.clear()
+
+            temp_path: Path = self.filepath.with_name(self.filepath.name + ".tmp")
+
+            with open(temp_path, mode="w+", encoding="UTF-8") as f:
+                json.dump(
+                    data,
+                    f,
+                    indent=4,
+                    ensure_ascii=False
+                )
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(temp_path, self.filepath)
+
+    def close(self) -> None:
+        """
+        Stop background thread and write all pending updates.
+        """
+        if not self.active:
+            return
+
+        self.active = False
+        self.close_event.set()
+        self.dirty_event.set()
+        self.thread.join()
+
+        self.flush()
+
+    def run(self) -> None:
+        """
+        Background thread writing updates coalesced within interval.
+        """
+        while self.active:
+            self.dirty_event.wait()
+
+            # Wait for more updates, unless closing
+            self.close_event.wait(self.interval)
+            self.dirty_event.clear()
+
+            try:
+                self.flush()
+            except Exception:
+                msg: str = _("数据文件{}写入失败：{}").format(self.filepath, traceback.format_exc())
+                self.output(msg)
@@ -0,0 +1,121 @@
+"""
+Lightweight wall time profiling of backtesting phases.
+"""
+
+from collections.abc import Callable
+from time import perf_counter
+from typing import Any
+
+
+class ProfiledCall:
+    """
+    Callable wrapper accumulating wall time and call count into a record.
+
+    A class is used instead of closure, so that deepcopy of profiled engine
+    rebinds the wrapped method to the copied object.
+    """
+
+    def __init__(self, func: Callable, record: list) -> None:
+        """"""
+        self.func: Callable = func
+        self.record: list = record
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """"""
+        start: float = perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            record: list = self.record
+            record[0] += perf_counter() - start
+            record[1] += 1
+
+
+class ReportingCall(ProfiledCall):
+    """
+    Profiled wrapper which adds report of all phases into the dict returned,
+    after time of the call itself has been recorded.
+    """
+
+    def __init__(self, func: Callable, record: list, profiler: "PhaseProfiler") -> None:
+        """"""
+        super().__init__(func, record)
+
+        self.profiler: PhaseProfiler = profiler
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """"""
+        result: Any = super().__call__(*args, **kwargs)
+
+        if result and isinstance(result, dict):
+            result["profile"] = self.profiler.get_report()
+
+        return result
+
+
+class PhaseProfiler:
+    """
+    Profiler of methods replaced by ProfiledCall on object instances.
+
+    Time of nested calls is inclusive, e.g. time of on_bar called by
+    BarGenerator is also counted in on_tick of the same strategy.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        # Accumulated [time, count] of each phase
+        self.records: dict[str, list] = {}
+
+    def wrap(self, obj: Any, names: tuple[str, ...], report: bool = False) -> None:
+        """
+        Replace methods of object with profiled wrappers.
+
+        If report is True, report is added into dict returned by the methods.
+        """
+        for name in names:
+            func: Callable = getattr(obj, name)
+
+            # Avoid wrapping twice
+            if isinstance(func, ProfiledCall):
+                continue
+
+            record: list = self.records.setdefault(name, [0.0, 0])
+
+            if report:
+                setattr(obj, name, ReportingCall(func, record, self))
+            else:
+                setattr(obj, name, ProfiledCall(func, record))
+
+    def unwrap(self, obj: Any, names: tuple[str, ...]) -> None:
+        """
+        Restore methods of object replaced by wrap.
+        """
+        for name in names:
+            if isinstance(obj.__dict__.get(name, None), ProfiledCall):
+                delattr(obj, name)
+
+    def clear(self) -> None:
+        """
+        Reset all records to zero.
+        """
+        for record in self.records.values():
+            record[0] = 0.0
+            record[1] = 0
+
+    def get_report(self) -> dict[str, dict]:
+        """
+        Get total time, call count and average time in microseconds of each phase.
+        """
+        report: dict[str, dict] = {}
+
+        for name, (total, count) in self.records.items():
+            if not count:
+                continue
+
+            report[name] = {
+                "time": total,
+                "count": count,
+                "average_us": total / count * 1_000_000
+            }
+
+        return report
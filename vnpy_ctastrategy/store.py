@@ -0,0 +1,330 @@
+"""
+Storage of strategy setting and data of CtaEngine.
+"""
+
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+from threading import Lock
+from time import time
+
+from vnpy.trader.utility import load_json, save_json, get_file_path
+
+from .persistence import JsonFileWriter
+
+
+class BaseStrategyStore(ABC):
+    """
+    Abstract store of strategy setting and data(variables).
+
+    Setting of each strategy is a dict of class_name, vt_symbol and setting.
+    """
+
+    @abstractmethod
+    def load_setting(self) -> dict[str, dict]:
+        """
+        Load setting of all strategies.
+        """
+        pass
+
+    @abstractmethod
+    def load_data(self, strategy_names: list[str]) -> dict[str, dict]:
+        """
+        Load data of strategies given.
+        """
+        pass
+
+    @abstractmethod
+    def save_setting(self, strategy_name: str, setting: dict) -> None:
+        """
+        Save setting of one strategy.
+        """
+        pass
+
+    @abstractmethod
+    def save_data(self, strategy_name: str, data: dict) -> None:
+        """
+        Save data of one strategy.
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, strategy_name: str) -> None:
+        """
+        Remove both setting and data of one strategy.
+        """
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Make sure all data saved is written to disk.
+        """
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Flush and release resources before exit.
+        """
+        pass
+
+
+class JsonStrategyStore(BaseStrategyStore):
+    """
+    Store of setting and data in two json files.
+
+    Whole setting file is written on every change, while data file is written
+    in background by JsonFileWriter.
+    """
+
+    def __init__(
+        self,
+        setting_filename: str,
+        data_filename: str,
+        write_interval: float = 1,
+        output: Callable[[str], None] = print
+    ) -> None:
+        """"""
+        self.setting_filename: str = setting_filename
+        self.data_filename: str = data_filename
+        self.setting: dict[str, dict] = {}
+
+        self.data_writer: JsonFileWriter = JsonFileWriter(data_filename, write_interval, output)
+
+    def load_setting(self) -> dict[str, dict]:
+        """"""
+        self.setting = load_json(self.setting_filename)
+        return dict(self.setting)
+
+    def load_data(self, strategy_names: list[str]) -> dict[str, dict]:
+        """"""
+        data: dict = load_json(self.data_filename)
+
+        # Data of strategies not loaded is kept in file
+        self.data_writer.set_data(data)
+
+        return {name: data[name] for name in strategy_names if name in data}
+
+    def save_setting(self, strategy_name: str, setting: dict) -> None:
+        """"""
+        self.setting[strategy_name] = setting
+        save_json(self.setting_filename, self.setting)
+
+    def save_data(self, strategy_name: str, data: dict) -> None:
+        """"""
+        self.data_writer.update(strategy_name, data)
+
+    def remove(self, strategy_name: str) -> None:
+        """"""
+        if self.setting.pop(strategy_name, None) is not None:
+            save_json(self.setting_filename, self.setting)
+
+        self.data_writer.remove(strategy_name)
+
+    def flush(self) -> None:
+        """"""
+        self.data_writer.flush()
+
+    def close(self) -> None:
+        """"""
+        self.data_writer.close()
+
+
+class SqliteStrategyStore(BaseStrategyStore):
+    """
+    Store of setting and data in SQLite database file.
+
+    Setting and data of each strategy are individual rows updated by key, so
+    cost of each update does not depend on number of strategies.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """"""
+        self.path: Path = get_file_path(filename)
+
+        # Connection is shared by event engine thread and init thread
+        self.lock: Lock = Lock()
+
+        self.connection: sqlite3.Connection = sqlite3.connect(
+            self.path,
+            timeout=60,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS setting "
+            "(name TEXT PRIMARY KEY, class_name TEXT NOT NULL, "
+            "vt_symbol TEXT NOT NULL, setting TEXT NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS data (name TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    def import_json(self, setting_filename: str, data_filename: str) -> bool:
+        """
+        Import setting and data from json files once, return whether imported.
+
+        Json files are left untouched, and never imported again once done.
+        """
+        with self.lock:
+            connection: sqlite3.Connection = self.connection
+
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row: tuple | None = connection.execute(
+                    "SELECT value FROM meta WHERE key = 'json_imported'"
+                ).fetchone()
+                if row:
+                    connection.execute("COMMIT")
+                    return False
+
+                setting: dict = read_json_file(setting_filename)
+                connection.executemany(
+                    "INSERT OR REPLACE INTO setting (name, class_name, vt_symbol, setting) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            name,
+                            config["class_name"],
+                            config["vt_symbol"],
+                            json.dumps(config["setting"], ensure_ascii=False)
+                        )
+                        for name, config in setting.items()
+                    ]
+                )
+
+                data: dict = read_json_file(data_filename)
+                connection.executemany(
+                    "INSERT OR REPLACE INTO data (name, data) VALUES (?, ?)",
+                    [
+                        (name, json.dumps(value, ensure_ascii=False))
+                        for name, value in data.items()
+                    ]
+                )
+
+                connection.execute(
+                    "INSERT INTO meta (key, value) VALUES ('json_imported', ?)",
+                    (json.dumps({"files": [setting_filename, data_filename], "time": time()}),)
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+        return True
+
+    def get_import_time(self) -> float | None:
+        """
+        Get timestamp when json files were imported.
+        """
+        with self.lock:
+            row: tuple | None = self.connection.execute(
+                "SELECT value FROM meta WHERE key = 'json_imported'"
+            ).fetchone()
+
+        if not row:
+            return None
+
+        imported: float = json.loads(row[0])["time"]
+        return imported
+
+    def load_setting(self) -> dict[str, dict]:
+        """"""
+        with self.lock:
+            rows: list[tuple] = self.connection.execute(
+                "SELECT name, class_name, vt_symbol, setting FROM setting ORDER BY rowid"
+            ).fetchall()
+
+        return {
+            name: {
+                "class_name": class_name,
+                "vt_symbol": vt_symbol,
+                "setting": json.loads(setting)
+            }
+            for name, class_name, vt_symbol, setting in rows
+        }
+
+    def load_data(self, strategy_names: list[str]) -> dict[str, dict]:
+        """"""
+        result: dict[str, dict] = {}
+
+        with self.lock:
+            for name in strategy_names:
+                row: tuple | None = self.connection.execute(
+                    "SELECT data FROM data WHERE name = ?", (name,)
+                ).fetchone()
+                if row:
+                    result[name] = json.loads(row[0])
+
+        return result
+
+    def save_setting(self, strategy_name: str, setting: dict) -> None:
+        """"""
+        with self.lock:
+            # Upsert keeps rowid, so that strategies are loaded in order added
+            self.connection.execute(
+                "INSERT INTO setting (name, class_name, vt_symbol, setting) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET class_name = excluded.class_name, "
+                "vt_symbol = excluded.vt_symbol, setting = excluded.setting",
+                (
+                    strategy_name,
+                    setting["class_name"],
+                    setting["vt_symbol"],
+                    json.dumps(setting["setting"], ensure_ascii=False)
+                )
+            )
+
+    def save_data(self, strategy_name: str, data: dict) -> None:
+        """"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO data (name, data) VALUES (?, ?)",
+                (strategy_name, json.dumps(data, ensure_ascii=False))
+            )
+
+    def remove(self, strategy_name: str) -> None:
+        """"""
+        with self.lock:
+            connection: sqlite3.Connection = self.connection
+
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM setting WHERE name = ?", (strategy_name,))
+                connection.execute("DELETE FROM data WHERE name = ?", (strategy_name,))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+    def flush(self) -> None:
+        """
+        Checkpoint WAL into database file.
+        """
+        with self.lock:
+            self.connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        """"""
+        with self.lock:
+            self.connection.close()
+
+
+def read_json_file(filename: str) -> dict:
+    """
+    Read json file in trader folder, without creating it if not exists.
+    """
+    filepath: Path = get_file_path(filename)
+    if not filepath.exists():
+        return {}
+
+    with open(filepath, encoding="UTF-8") as f:
+        data: dict = json.load(f)
+    return data
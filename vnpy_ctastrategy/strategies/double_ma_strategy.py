@@ -27,6 +27,7 @@ class DoubleMaStrategy(CtaTemplate):
 
     parameters = ["fast_window", "slow_window"]
     variables = ["fast_ma0", "fast_ma1", "slow_ma0", "slow_ma1"]
+    warmup_parameters = []
 
     def on_init(self) -> None:
         """
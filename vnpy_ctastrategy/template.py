@@ -16,6 +16,11 @@ class CtaTemplate(ABC):
     parameters: list = []
     variables: list = []
 
+    # Parameters affecting strategy state after on_init, None if not declared.
+    # Optimization reuses warm-up result for settings with the same values of
+    # these parameters, so parameters used in __init__ must be included.
+    warmup_parameters: list | None = None
+
     def __init__(
         self,
         cta_engine: Any,